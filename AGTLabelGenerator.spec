@@ -6,7 +6,7 @@ a = Analysis(
     pathex=[],
     binaries=[],
     datas=[('templates', 'templates'), ('assets', 'assets'), ('/Library/Frameworks/Python.framework/Versions/3.11/lib/python3.11/site-packages/docxcompose/templates', 'docxcompose/templates')],
-    hiddenimports=[],
+    hiddenimports=['docxtpl', 'docx', 'docxcompose.composer'],  # imported lazily in MAIN.py
     hookspath=[],
     hooksconfig={},
     runtime_hooks=[],
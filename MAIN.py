@@ -6,7 +6,8 @@ This script reads and processes an Excel file, applies various filters,
 generates dynamic DOCX files with product labels/tags using multiple DOCX libraries,
 and provides a Tkinter GUI for user interaction.
 """
-import sys, os, platform, subprocess, re, datetime, math, traceback, logging
+import sys, os, platform, subprocess, re, datetime, math, traceback, logging, hashlib, time, bisect
+_STARTUP_T0 = time.perf_counter()
 import concurrent.futures
 from io import BytesIO
 from copy import deepcopy
@@ -18,27 +19,12 @@ import numpy as np
 from functools import lru_cache
 from pathlib import Path
 import io
-import threading, urllib.request, json
-import urllib.request
-import json
-from difflib import SequenceMatcher
-from tkinter import tk
-
-
-
-
-# ------------------ Third-Party DOCX Imports ------------------
-from docxtpl import DocxTemplate, InlineImage
-from docx import Document
-from docx.shared import Mm, Pt, RGBColor, Inches
-from docx.enum.text import WD_ALIGN_PARAGRAPH
-from docx.oxml.ns import qn
-from docx.oxml.shared import OxmlElement
-from docxcompose.composer import Composer
-import docxcompose
-import os, datetime
+import threading, json
 from tkinter import simpledialog
-import urllib.request, json
+
+# The DOCX stack (docxtpl, python-docx, docxcompose), urllib and difflib are
+# imported inside the functions that use them so the splash isn't held up
+# by modules only tag generation and JSON matching need.
 
 
 TEMPLATE_PATH = os.path.join(
@@ -50,7 +36,7 @@ TEMPLATE_PATH = os.path.join(
 INVENTORY_SLIP_TEMPLATE = os.path.join(
     os.path.dirname(__file__),
     "templates",
-    "inventory_slip.docx"
+    "InventorySlips.docx"
 )
 
 
@@ -62,12 +48,30 @@ LOG_PATH = os.path.join(
 )
 
 
-import os, docxcompose
-docxcompose_templates = (os.path.join(os.path.dirname(docxcompose.__file__), "templates"), "docxcompose/templates")
-
 logging.basicConfig(level=logging.DEBUG, format="%(asctime)s %(levelname)s: %(message)s")
 logging.debug("Application starting...")
 
+# ------------------ Startup Timing ------------------
+# Wall time of each startup phase on the Tk thread, measured from the first
+# line of this module.  Logged once the main window is up; for a per-module
+# breakdown of the "imports" phase run `python -X importtime MAIN.py`.
+STARTUP_PHASES = []
+_startup_last = _STARTUP_T0
+
+def startup_phase(name):
+    """Close the current startup phase under *name*."""
+    global _startup_last
+    now = time.perf_counter()
+    STARTUP_PHASES.append((name, now - _startup_last))
+    _startup_last = now
+
+def report_startup_timing():
+    total = sum(seconds for _, seconds in STARTUP_PHASES)
+    lines = "\n".join(f"  {name:<18}{seconds * 1000:>8.0f} ms" for name, seconds in STARTUP_PHASES)
+    logging.info("Startup timing (%.0f ms total):\n%s", total * 1000, lines)
+
+startup_phase("imports")
+
 from concurrent.futures import ThreadPoolExecutor
 _IO_POOL = ThreadPoolExecutor(max_workers=1)          # single worker for I/O
 
@@ -81,16 +85,18 @@ def _add_cat_value(series, value):
     return series
 
 _UPDATING_FILTERS = False
+_DROPDOWN_UPDATE_PENDING = False
+product_search_var = None
+range_sliders = {}  # RANGE_FILTER_COLUMNS key -> (lo DoubleVar, hi DoubleVar, lo Scale, hi Scale)
 
 # Global variable to track which canvas is active.
 # Global variables
 current_canvas = None
 available_canvas = None
 selected_canvas  = None
-available_tags_container = None
-selected_tags_container = None
 product_state_vars = {}
 undo_stack = []  # For undo functionality
+redo_stack = []  # moves taken back by Undo, replayed by Redo
 placeholder_img = None
 print_vendor_back_var = None
 SCALE_FACTOR = 1.0
@@ -148,7 +154,6 @@ def on_load_json_url(url: str):
     # fetch in a thread so the UI doesn’t freeze
     threading.Thread(target=_fetch_and_match, args=(url,), daemon=True).start()
 
-from difflib import SequenceMatcher
 import re
 
 # compile once
@@ -191,6 +196,8 @@ def _build_sheet_cache():
     _sheet_cache = cache
 
 def _fetch_and_match(url: str):
+    import urllib.request
+    from difflib import SequenceMatcher
     splash = show_splash2(root)
     global json_matched_names, _sheet_cache
     if _sheet_cache is None:
@@ -325,9 +332,10 @@ def resource_path(relative_path):
     try:
         base_path = sys._MEIPASS  # set by PyInstaller
     except Exception:
-        base_path = os.path.abspath(".")
+        # next to this script, so it works from any cwd (cron, shortcuts)
+        base_path = os.path.dirname(os.path.abspath(__file__))
     full_path = os.path.join(base_path, relative_path)
-    print(f"Loading resource from: {full_path}")
+    logging.debug("Loading resource from: %s", full_path)
     return full_path
 
 def open_file(file_path):
@@ -345,32 +353,24 @@ def open_file(file_path):
         logging.error("Error opening file: %s", e)
 
 
+POSABIT_EXPORT_PREFIX = "A Greener Today"
+POSABIT_EXPORT_SUFFIXES = (".xlsx", ".csv")
+
+def is_posabit_export(filename):
+    return filename.startswith(POSABIT_EXPORT_PREFIX) and filename.lower().endswith(POSABIT_EXPORT_SUFFIXES)
+
 def get_default_upload_file():
     """
-    Looks for files in the Downloads folder that start with "A Greener Today" and end with ".xlsx".
+    Looks for files in the Downloads folder that start with "A Greener Today" and end with ".xlsx" or ".csv".
     Returns the full path of the most recently modified file, or None if no matching file is found.
     """
-    downloads_dir = os.path.join(os.path.expanduser("~"), "Downloads")
-    files = []
-    
-    # Scan the Downloads directory for matching files.
-    for f in os.listdir(downloads_dir):
-        if f.startswith("A Greener Today") and f.lower().endswith(".xlsx"):
-            full_path = os.path.join(downloads_dir, f)
-            files.append(full_path)
-    
-    if files:
-        # Use the most recently modified file.
-        latest_file = max(files, key=os.path.getmtime)
-        return latest_file
-    else:
-        return None
+    return latest_posabit_export()
 
 # ------------------ Global Variables and Font Schemes ------------------
 global_df = None  # DataFrame from Excel file
 product_check_vars = {}  # (Legacy: not used for filtering labels anymore)
-selected_tags_vars = {}   # Dictionary for items moved to Selected Tag List (key: product name)
-available_tags_vars = {}    # Dictionary for available tag list
+selected_tags = {}   # Selected Tag List: product name -> tag id (checked state in tag_checks())
+available_tags = {}  # Available Tag List: product name -> tag id
 move_history = []
 
 
@@ -449,8 +449,7 @@ def edit_data_manually():
     )
     if response:
         try:
-            global global_df
-            global_df = pd.read_excel(transformed_excel_file, engine="openpyxl")
+            set_global_df(pd.read_excel(transformed_excel_file, engine="openpyxl"), transformed_excel_file)
             populate_filter_dropdowns()
             populate_product_names()
             messagebox.showinfo("Reload Successful", "Data has been reloaded from the edited file.")
@@ -459,6 +458,8 @@ def edit_data_manually():
 
 # ------------------ DOCX Helper Functions ------------------
 def disable_autofit(table):
+    from docx.oxml.ns import qn
+    from docx.oxml.shared import OxmlElement
     tbl = table._element
     tblPr = tbl.find(qn('w:tblPr'))
     if tblPr is None:
@@ -469,6 +470,8 @@ def disable_autofit(table):
     tblPr.append(tblLayout)
 
 def set_table_cell_spacing(table, spacing_twips):
+    from docx.oxml.ns import qn
+    from docx.oxml.shared import OxmlElement
     tblPr = table._element
     tblPr_obj = tblPr.find(qn('w:tblPr'))
     if tblPr_obj is None:
@@ -482,6 +485,8 @@ def set_table_cell_spacing(table, spacing_twips):
     tblCellSpacing.set(qn('w:type'), 'dxa')
 
 def _set_row_height_exact(row, height_pt):
+    from docx.oxml.ns import qn
+    from docx.oxml.shared import OxmlElement
     trPr = row._tr.get_or_add_trPr()
     for child in trPr.findall(qn('w:trHeight')):
         trPr.remove(child)
@@ -494,6 +499,8 @@ def cell_has_text(cell):
     return bool(cell.text.strip())
 
 def rebuild_table_with_nonempty_cells(doc, old_table, num_cols=5):
+    from docx.oxml.ns import qn
+    from docx.oxml.shared import OxmlElement
     non_empty_texts = [
     cell.text for row in old_table.rows for cell in row.cells if cell_has_text(cell)
 ]
@@ -543,6 +550,9 @@ def rebuild_table_with_nonempty_cells(doc, old_table, num_cols=5):
 
 
 def expand_template_to_3x3_fixed(template_path):
+    from docx import Document
+    from docx.oxml.ns import qn
+    from docx.oxml.shared import OxmlElement
     doc = Document(template_path)
     if not doc.tables:
         raise ValueError("Template must contain at least one table.")
@@ -712,6 +722,8 @@ def expand_template_to_4x5_fixed_scaled(template_path, scale_factor=1.0):
 
 # ------------------ Autosize and Conditional Formatting ------------------
 def set_run_font_size(run, font_size):
+    from docx.oxml.ns import qn
+    from docx.oxml.shared import OxmlElement
     run.font.size = font_size
     sz_val = str(int(font_size.pt * 2))
     rPr = run._element.get_or_add_rPr()
@@ -721,8 +733,6 @@ def set_run_font_size(run, font_size):
         rPr.append(sz)
     sz.set(qn('w:val'), sz_val)
 
-from docx.shared import Pt
-
 def _complexity(text):
     """Combine character count and weighted word count into one score."""
     text = str(text or "")
@@ -730,6 +740,7 @@ def _complexity(text):
 
 
 def get_thresholded_font_size_by_word_count(text, orientation='vertical', scale_factor=1.0):
+    from docx.shared import Pt
     comp = _complexity(text)
     o = orientation.lower()
 
@@ -766,6 +777,7 @@ def get_thresholded_font_size_by_word_count(text, orientation='vertical', scale_
 
 
 def get_thresholded_font_size_ratio(text, orientation='vertical', scale_factor=1.0):
+    from docx.shared import Pt
     comp = _complexity(text)
     o = orientation.lower()
 
@@ -795,6 +807,7 @@ def get_thresholded_font_size_ratio(text, orientation='vertical', scale_factor=1
 
 
 def get_thresholded_font_size_brand(text, orientation='vertical', scale_factor=1.0):
+    from docx.shared import Pt
     comp = _complexity(text)
     o = orientation.lower()
 
@@ -820,6 +833,8 @@ def get_thresholded_font_size_brand(text, orientation='vertical', scale_factor=1
 
 
 def autosize_field_in_paragraph(para, marker_start, marker_end, font_params, orientation, font_name="Arial", bold=True, scale_factor=1.0):
+    from docx.shared import Pt
+    from docx.enum.text import WD_ALIGN_PARAGRAPH
     full_text = "".join(run.text for run in para.runs)
     if marker_start in full_text and marker_end in full_text:
         try:
@@ -827,7 +842,7 @@ def autosize_field_in_paragraph(para, marker_start, marker_end, font_params, ori
         except IndexError:
             return
         # Debug print:
-        print(f"[DEBUG] Field text for marker {marker_start}: '{field_text}'")
+        logging.debug("Field text for marker %s: %r", marker_start, field_text)
         if marker_start == "PRODUCTBRAND_CENTER_START":
             new_size_val = get_thresholded_font_size_brand(field_text, orientation, scale_factor)
         elif marker_start == "DESC_START":
@@ -928,6 +943,8 @@ def apply_formatting_to_cell(cell):
 
 
 def set_cell_background(cell, color_hex):
+    from docx.oxml.ns import qn
+    from docx.oxml.shared import OxmlElement
     if not cell.text.strip():
         cell.text = " "
     tc = cell._tc
@@ -941,6 +958,7 @@ def set_cell_background(cell, color_hex):
     tcPr.append(new_shd)
 
 def set_font_color_white(cell):
+    from docx.shared import RGBColor
     for para in cell.paragraphs:
         for run in para.runs:
             run.font.color.rgb = RGBColor(255, 255, 255)
@@ -960,6 +978,7 @@ def shade_middle_row_if_needed(doc, shade_color="C0C0C0"):
     return doc
 
 def safe_fix_paragraph_spacing(doc):
+    from docx.shared import Pt
     for para in doc.paragraphs:
         para.paragraph_format.space_before = Pt(0)
         para.paragraph_format.space_after = Pt(0)
@@ -972,6 +991,7 @@ def safe_fix_paragraph_spacing(doc):
     return doc
 
 def remove_extra_spacing(doc):
+    from docx.shared import Pt
     try:
         normal_style = doc.styles["Normal"].paragraph_format
         normal_style.space_before = Pt(0)
@@ -982,6 +1002,8 @@ def remove_extra_spacing(doc):
     return doc
 
 def clear_cell_margins(doc):
+    from docx.oxml.ns import qn
+    from docx.oxml.shared import OxmlElement
     for table in doc.tables:
         for row in table.rows:
             for cell in row.cells:
@@ -996,6 +1018,7 @@ def clear_cell_margins(doc):
     return doc
 
 def clear_table_cell_padding(doc):
+    from docx.oxml.ns import qn
     for table in doc.tables:
         tblPr = table._element.find(qn('w:tblPr'))
         if tblPr is not None:
@@ -1009,6 +1032,8 @@ def clear_table_cell_padding(doc):
     return doc
 
 def compact_table_cells(doc, num_cols=3):
+    from docx.oxml.ns import qn
+    from docx.oxml.shared import OxmlElement
     if not doc.tables:
         return doc
     orig_table = doc.tables[0]
@@ -1043,6 +1068,8 @@ def compact_table_cells(doc, num_cols=3):
     return new_table
 
 def reapply_table_cell_spacing_only(doc, spacing_inches=0.03):
+    from docx.oxml.ns import qn
+    from docx.oxml.shared import OxmlElement
     spacing_twips = int(spacing_inches * 1440)
     for table in doc.tables:
         tblPr = table._element.find(qn('w:tblPr'))
@@ -1155,23 +1182,199 @@ def fix_description_spacing(desc):
     # (\d) captures the first digit that follows.
     return re.sub(r'(?<!\s)-\s*(\d)', r' - \1', desc)
 
-def preprocess_excel(file_path, filters=None):
-    import datetime, os, re
-    import numpy as np
-    import pandas as pd
-
-    # 1) Read & dedupe, force-key columns to string for .str ops
-    dtype_dict = {
-        "Product Type*": "string",
-        "Lineage": "string",
-        "Product Brand": "string",
-        "Vendor": "string",
-        "Weight Unit* (grams/gm or ounces/oz)": "string",
-        "Product Name*": "string"
-    }
-    df = pd.read_excel(file_path, engine="openpyxl", dtype=dtype_dict)
-    df.drop_duplicates(inplace=True)
+# Key text columns are forced to string dtype so the .str ops below work
+# no matter where the frame came from (fresh export or an in-memory copy).
+POSABIT_TEXT_DTYPES = {
+    "Product Type*": "string",
+    "Lineage": "string",
+    "Product Brand": "string",
+    "Vendor": "string",
+    "Weight Unit* (grams/gm or ounces/oz)": "string",
+    "Product Name*": "string"
+}
+
+# Raw export columns the label pipeline actually reads (before the renames
+# in clean_posabit_frame).  Everything else in a POSaBit export is ignored
+# by the GUI and generation paths.
+PIPELINE_COLUMNS = (
+    "Product Name*", "Product Type*", "Lineage", "Product Brand",
+    "Vendor", "Vendor/Supplier*",
+    "Weight*", "Weight Unit* (grams/gm or ounces/oz)",
+    "Price* (Tier Name for Bulk)", "Price",
+    "DOH Compliant (Yes/No)", "Concentrate Type", "Product Strain",
+    "Quantity*", "Quantity Received*", "Quantity",
+    "Barcode*", "Accepted Date",
+)
+
+def read_posabit_export(file_path, columns=None):
+    """
+    Read a raw POSaBit export (.xlsx or .csv) into a DataFrame.
+
+    With *columns* only those headers are materialized; for .xlsx that uses
+    openpyxl's streaming read-only mode instead of a full pd.read_excel parse.
+    """
+    if str(file_path).lower().endswith(".csv"):
+        return read_posabit_csv(file_path, columns)
+    if columns is not None:
+        return read_excel_projected(file_path, columns)
+    return pd.read_excel(file_path, engine="openpyxl", dtype=POSABIT_TEXT_DTYPES)
+
+# Text columns read from CSV as strings so the parser never guesses (and
+# e.g. barcodes keep their leading zeros).  Numeric columns are left to
+# clean_posabit_frame, which coerces them itself.
+CSV_TEXT_COLUMNS = tuple(POSABIT_TEXT_DTYPES) + (
+    "Vendor/Supplier*", "DOH Compliant (Yes/No)", "Concentrate Type",
+    "Product Strain", "Barcode*", "Price* (Tier Name for Bulk)",
+)
+CSV_CHUNK_BYTES = 64 * 1024 * 1024   # larger CSVs are parsed in chunks
+CSV_CHUNK_ROWS = 50_000
+
+def _pyarrow_available():
+    import importlib.util
+    return importlib.util.find_spec("pyarrow") is not None
+
+def read_posabit_csv(file_path, columns=None):
+    """
+    Read a POSaBit CSV export with explicit string dtypes for the text
+    columns.  Uses pandas' pyarrow engine when pyarrow is installed; files
+    over CSV_CHUNK_BYTES go through the C engine in CSV_CHUNK_ROWS chunks.
+    """
+    header = pd.read_csv(file_path, nrows=0, encoding="utf-8-sig").columns
+    usecols = [c for c in header if columns is None or c in columns]
+    dtype = {c: "string" for c in CSV_TEXT_COLUMNS if c in usecols}
+
+    if os.path.getsize(file_path) > CSV_CHUNK_BYTES:
+        chunks = pd.read_csv(
+            file_path, usecols=usecols, dtype=dtype, encoding="utf-8-sig",
+            chunksize=CSV_CHUNK_ROWS, low_memory=True
+        )
+        df = pd.concat(chunks, ignore_index=True)
+    elif _pyarrow_available():
+        df = pd.read_csv(file_path, usecols=usecols, dtype=dtype,
+                         encoding="utf-8-sig", engine="pyarrow")
+    else:
+        df = pd.read_csv(file_path, usecols=usecols, dtype=dtype, encoding="utf-8-sig")
+    return df.dropna(how="all")
+
+def read_excel_projected(file_path, columns):
+    """
+    Stream the first sheet of *file_path* row by row and keep only the
+    cells under the headers in *columns*.  Rows that are blank in every
+    projected column are skipped, like pd.read_excel skips blank lines.
+    """
+    from openpyxl import load_workbook
+    from operator import itemgetter
+
+    wanted = set(columns)
+    wb = load_workbook(file_path, read_only=True, data_only=True)
+    try:
+        ws = wb.worksheets[0]
+        # exports from some tools carry a bogus <dimension>; scan everything
+        ws.reset_dimensions()
+        rows = ws.iter_rows(values_only=True)
+        header = next(rows, None) or ()
+
+        positions, names = [], []
+        for i, name in enumerate(header):
+            if name in wanted and name not in names:
+                positions.append(i)
+                names.append(name)
+        if not positions:
+            return pd.DataFrame(columns=names)
+
+        width = max(positions) + 1
+        pad = (None,) * width
+        pick = itemgetter(*positions)
+        records = []
+        for row in rows:
+            if len(row) < width:
+                row = row + pad[len(row):]
+            vals = pick(row)
+            if len(positions) == 1:
+                vals = (vals,)
+            if any(v is not None for v in vals):
+                records.append(vals)
+    finally:
+        wb.close()
+
+    df = pd.DataFrame.from_records(records, columns=names)
+    for col, dtype in POSABIT_TEXT_DTYPES.items():
+        if col in df.columns:
+            df[col] = df[col].astype(dtype)
+    return df
+
+# ------------------ Vectorized Column Helpers ------------------
+# Used by clean_posabit_frame instead of per-row .apply calls.
+
+def _map_distinct(values, func, na_value):
+    """
+    Apply *func* once per distinct non-null value of *values* and broadcast
+    the results back; nulls become *na_value*.  Exports repeat the same few
+    weights/prices thousands of times, so this is O(rows) in NumPy plus
+    O(distinct) Python calls.
+    """
+    codes, uniques = pd.factorize(values)
+    mapped = np.array([func(u) for u in uniques] + [na_value], dtype=object)
+    return pd.Series(mapped[codes], index=values.index, dtype=object)
 
+def _format_weight_value(x):
+    return str(int(x)) if float(x).is_integer() else str(x)
+
+def format_weight_column(weights):
+    """Weight* as display strings: 3.0 -> '3', 3.5 -> '3.5', missing -> 'nan'."""
+    return _map_distinct(pd.to_numeric(weights, errors="coerce"), _format_weight_value, "nan")
+
+def _format_price_value(p):
+    s = str(p).strip().lstrip("$").replace("'", "").strip()
+    try:
+        v = float(s)
+        return f"${int(v)}" if v.is_integer() else f"${v:.2f}"
+    except ValueError:
+        return f"${s}"
+
+def format_price_column(prices):
+    """Price as '$25' / '$12.50'; missing prices become ''."""
+    return _map_distinct(prices, _format_price_value, "")
+
+def force_mixed_strain(strain):
+    """Everything that isn't 'CBD Blend' becomes 'Mixed' (categorical)."""
+    codes, uniques = pd.factorize(strain)
+    is_blend = np.array([str(u) == "CBD Blend" for u in uniques] + [False])[codes]
+    cat = pd.Categorical.from_codes(np.where(is_blend, 0, 1), categories=["CBD Blend", "Mixed"])
+    return pd.Series(cat, index=strain.index).cat.remove_unused_categories()
+
+def preroll_ratio_column(ratio, product_type):
+    """
+    Pre-rolls keep only the tail of their Ratio: with 3+ ' - ' parts
+    everything after the second, with 2 parts the second, otherwise the
+    whole thing; the result is prefixed with ' - '.  Other rows are
+    returned unchanged.
+    """
+    out = ratio.astype(object)
+    mask = product_type.astype(str).str.strip().str.lower().isin(["pre-roll", "infused pre-roll"])
+    if mask.any():
+        parts = ratio[mask].astype(str).str.split(" - ", regex=False)
+        n = parts.str.len()
+        new = parts.str[0]
+        new = new.where(n != 2, parts.str[1])
+        new = new.where(n < 3, parts.str[2:].str.join(" - "))
+        out[mask] = " - " + new.str.strip()
+    return out
+
+def _coerce_text_columns(df):
+    """Force the text columns the pipeline runs .str ops on to string dtype."""
+    for col, dtype in POSABIT_TEXT_DTYPES.items():
+        if col in df.columns and df[col].dtype != dtype:
+            df[col] = df[col].astype(dtype)
+    return df
+
+def derive_posabit_rows(df):
+    """
+    Row-local half of clean_posabit_frame: every value it produces depends
+    only on the row it came from, so rows can be derived in any subset and
+    stitched back together (see ingest_incremental).  Index labels are kept
+    and no categoricals are built here.
+    """
     # 2) Trim product names
     if "Product Name*" in df.columns:
         df["Product Name*"] = df["Product Name*"].str.lstrip()
@@ -1182,7 +1385,7 @@ def preprocess_excel(file_path, filters=None):
             df[col] = "Unknown"
 
     # 4) Exclude sample rows
-    df = df[~df["Product Type*"].isin(["Samples - Educational", "Sample - Vendor"])]
+    df = df[~df["Product Type*"].isin(["Samples - Educational", "Sample - Vendor"])].copy()
 
     # 5) Rename for convenience
     df.rename(columns={
@@ -1215,140 +1418,569 @@ def preprocess_excel(file_path, filters=None):
               .str.upper()
         )
 
+    mask_para = df["Product Type*"].str.strip().str.lower() == "paraphernalia"
+
     # 8) Build Description & Ratio & Strain
     if "Product Name*" in df.columns:
         df["Description"] = df["Product Name*"].str.split(" by").str[0]
-        mask_para = df["Product Type*"].str.strip().str.lower() == "paraphernalia"
         df.loc[mask_para, "Description"] = (
             df.loc[mask_para, "Description"]
               .str.replace(r"\s*-\s*\d+g$", "", regex=True)
         )
-            # ──  REMOVE DUPLICATES BASED ON Description ───────────────
-        df = df.drop_duplicates(subset=["Description"], keep="first")
 
-           # … after this block that builds df["Ratio"] …
-        df["Ratio"] = df["Product Name*"].str.extract(r"-\s*(.+)").fillna("")
+        df["Ratio"] = df["Product Name*"].str.extract(r"-\s*(.+)")[0].fillna("")
         df["Ratio"] = df["Ratio"].str.replace(r" / ", " ", regex=True)
 
-            # ── ensure “Product Strain” exists and is a Categorical ──────────────
+        # Force all non-CBD-Blend strains to "Mixed", then CBD Blend for any
+        # ratio containing CBD, CBC, CBN or CBG
         if "Product Strain" not in df.columns:
             df["Product Strain"] = ""
-        # this will turn anything in that column into a category dtype
-        df["Product Strain"] = df["Product Strain"].astype("category")
-
-            # ‑‑‑ Force all non‑CBD‑Blend strains to "Mixed" ───────────────────────
-        if "Product Strain" in df.columns:
-            # Convert to plain string then override
-            df["Product Strain"] = df["Product Strain"].astype(str).apply(
-                lambda s: "CBD Blend" if s == "CBD Blend" else "Mixed"
-            ).astype("category")
-
-
-        # ── now force CBD Blend for any ratio containing CBD, CBC, CBN or CBG ──
+        strain = force_mixed_strain(df["Product Strain"]).astype(object)
         mask_cbd_ratio = df["Ratio"].str.contains(
             r"\b(?:CBD|CBC|CBN|CBG)\b", case=False, na=False
         )
-        if mask_cbd_ratio.any():
-            # add “CBD Blend” to the categories if it’s not already there
-            if "CBD Blend" not in df["Product Strain"].cat.categories:
-                df["Product Strain"] = df["Product Strain"].cat.add_categories(["CBD Blend"])
-            # assign
-            df.loc[mask_cbd_ratio, "Product Strain"] = "CBD Blend"
-
-
-
-        # ── SPECIAL CASE: anything with Product Type “paraphernalia” gets
-    #    its Product Strain forcibly set to "Paraphernalia"
-    mask_para = df["Product Type*"].str.strip().str.lower() == "paraphernalia"
-
-    # ensure the column exists as categorical and add the new category
-    if "Product Strain" not in df.columns:
-        df["Product Strain"] = pd.Categorical([], categories=["Paraphernalia"])
-    else:
-        # if it’s already categorical, just add the new category
-        if isinstance(df["Product Strain"].dtype, pd.CategoricalDtype):
-            if "Paraphernalia" not in df["Product Strain"].cat.categories:
-                df["Product Strain"] = df["Product Strain"].cat.add_categories(["Paraphernalia"])
-        else:
-            # not categorical yet → make it categorical with this extra
-            df["Product Strain"] = pd.Categorical(df["Product Strain"], 
-                                                  categories=list(df["Product Strain"].unique()) + ["Paraphernalia"])
-
-    # now you can safely assign
+        strain[mask_cbd_ratio] = "CBD Blend"
+        df["Product Strain"] = strain
+    elif "Product Strain" not in df.columns:
+        df["Product Strain"] = np.nan
+
+    # SPECIAL CASE: anything with Product Type "paraphernalia" gets its
+    # Product Strain forcibly set to "Paraphernalia"
+    df["Product Strain"] = df["Product Strain"].astype(object)
     df.loc[mask_para, "Product Strain"] = "Paraphernalia"
 
-
-    # 9) Convert key fields to categorical
-    for col in ["Product Type*", "Lineage", "Product Brand", "Vendor"]:
-        if col in df.columns:
-            df[col] = df[col].astype("category")
-
     # 10) CBD overrides
-    if "Description" in df.columns and "Lineage" in df.columns:
-        cbd_mask = df["Description"].str.contains(
-            r"CBD|CBN|CBC|CBG|:", case=False, na=False
-        )
-        if "CBD" not in df["Lineage"].cat.categories:
-            df["Lineage"] = df["Lineage"].cat.add_categories(["CBD"])
-        df.loc[cbd_mask, "Lineage"] = "CBD"
-    if "Description" in df.columns and "Product Strain" in df.columns:
+    if "Description" in df.columns:
         cbd_mask = df["Description"].str.contains(
             r"CBD|CBN|CBC|CBG|:", case=False, na=False
         )
-        if "CBD Blend" not in df["Product Strain"].cat.categories:
-            df["Product Strain"] = df["Product Strain"].cat.add_categories(["CBD Blend"])
+        if "Lineage" in df.columns:
+            df.loc[cbd_mask, "Lineage"] = "CBD"
         df.loc[cbd_mask, "Product Strain"] = "CBD Blend"
 
+    # 12) Normalize Weight*
+    if "Weight*" in df.columns:
+        df["Weight*"] = format_weight_column(df["Weight*"])
+
+    # 13) Format Price
+    if "Price" in df.columns:
+        df["Price"] = format_price_column(df["Price"]).astype("string")
+
+    # 14) Special pre-roll Ratio logic
+    ratio = df["Ratio"] if "Ratio" in df.columns else pd.Series("", index=df.index, dtype=object)
+    df["Ratio"] = preroll_ratio_column(ratio, df["Product Type*"])
+
+    return df
+
+# Categories every cleaned frame carries even when no row uses them yet, so
+# later edits (change_lineage, overrides) can assign them directly.
+CATEGORY_EXTRAS = {
+    "Product Type*": (),
+    "Lineage": ("CBD",),
+    "Product Brand": (),
+    "Vendor": (),
+    "Product Strain": ("CBD Blend", "Paraphernalia"),
+}
+
+def finalize_posabit_frame(df):
+    """
+    Whole-frame half of clean_posabit_frame: Description dedupe, column
+    trim, categoricals and CombinedWeight.  Category order is sorted so the
+    result doesn't depend on which rows were derived when.
+    """
+    # Remove duplicates based on Description
+    if "Description" in df.columns:
+        df = df.drop_duplicates(subset=["Description"], keep="first")
+    else:
+        df = df.copy()
+
     # 11) Trim any extra columns
     if df.shape[1] > 41:
         df = df.iloc[:, :41]
 
-    # 12) Normalize Weight* and CombinedWeight
-    if "Weight*" in df.columns:
-        df["Weight*"] = pd.to_numeric(df["Weight*"], errors="coerce") \
-            .apply(lambda x: str(int(x)) if pd.notnull(x) and float(x).is_integer() else str(x))
+    # 9) Convert key fields to categorical
+    for col, extras in CATEGORY_EXTRAS.items():
+        if col in df.columns:
+            categories = set(df[col].dropna().unique()) | set(extras)
+            df[col] = pd.Categorical(df[col], categories=sorted(categories, key=str))
+
+    # 12) CombinedWeight
     if "Weight*" in df.columns and "Units" in df.columns:
         df["CombinedWeight"] = (df["Weight*"] + df["Units"]).astype("category")
 
-    # 13) Format Price
-    if "Price" in df.columns:
-        def format_p(p):
-            s = str(p).strip().lstrip("$").replace("'", "").strip()
+    # 15) Numeric stock level, price and weight for the numeric filters
+    df["QuantityOnHand"] = quantity_on_hand(df)
+    df["PriceValue"] = price_values(df)
+    df["WeightGrams"] = weight_grams(df)
+
+    return df.reset_index(drop=True)
+
+# Stock columns in order of preference; the first parseable value wins.
+QUANTITY_COLUMNS = ("Quantity*", "Quantity", "Quantity Received*")
+
+def quantity_on_hand(df):
+    """Float stock level per row from QUANTITY_COLUMNS (NaN if none parse)."""
+    qty = pd.Series(np.nan, index=df.index, dtype=float)
+    for col in QUANTITY_COLUMNS:
+        if col in df.columns:
+            qty = qty.fillna(pd.to_numeric(df[col], errors="coerce"))
+    return qty
+
+# Grams per unit for the Units values seen in exports.
+GRAMS_PER_UNIT = {"g": 1.0, "gm": 1.0, "gram": 1.0, "grams": 1.0, "mg": 0.001,
+                  "oz": 28.3495, "ounce": 28.3495, "ounces": 28.3495}
+
+def price_values(df):
+    """Float price per row parsed from the formatted Price column (NaN if none)."""
+    if "Price" not in df.columns:
+        return pd.Series(np.nan, index=df.index, dtype=float)
+    text = df["Price"].astype(str).str.replace(r"[$,']", "", regex=True).str.strip()
+    return pd.to_numeric(text, errors="coerce").astype(float)
+
+def weight_grams(df):
+    """Weight* converted to grams using Units (NaN for missing/unknown units)."""
+    if "Weight*" not in df.columns or "Units" not in df.columns:
+        return pd.Series(np.nan, index=df.index, dtype=float)
+    factor = df["Units"].astype(str).str.strip().str.lower().map(GRAMS_PER_UNIT)
+    return pd.to_numeric(df["Weight*"], errors="coerce") * factor.astype(float)
+
+def stock_mask(df):
+    """
+    NumPy bool mask of the rows with Quantity > 0.  Blank quantities count
+    as zero; a frame with no quantity data at all keeps every row.
+    """
+    if "QuantityOnHand" not in df.columns:
+        return np.ones(len(df), dtype=bool)
+    qty = df["QuantityOnHand"].to_numpy(dtype=float, na_value=np.nan)
+    if np.isnan(qty).all():
+        return np.ones(len(df), dtype=bool)
+    return qty > 0
+
+def clean_posabit_frame(df):
+    """
+    Apply all the label-pipeline normalization to a raw POSaBit frame and
+    return the cleaned, typed DataFrame (categoricals kept, 0..n-1 index).
+    """
+    # 1) Dedupe, force-key columns to string for .str ops
+    df = _coerce_text_columns(df).drop_duplicates()
+    return finalize_posabit_frame(derive_posabit_rows(df))
+
+def normalize_columns(df):
+    """
+    For each of these expected columns, add a categorical _norm_<col> helper
+    column holding normalize() of each value — but only if the source column
+    actually exists.  filter_by_value compares against these.
+    """
+    norm_cols = [
+        "Product Type*", "Lineage", "Product Brand", "Vendor",
+        "Product Strain", "CombinedWeight",
+        "Quantity", "Quantity Received*"
+    ]
+    for col in norm_cols:
+        if col in df.columns:
+            df[f"_norm_{col}"] = norm_column(df, col).astype("category")
+
+# Product types colored and grouped by their Lineage; every other type is
+# grouped by DisplayGroup's strain / paraphernalia rules instead.
+CLASSIC_TYPES = {
+    "flower", "pre-roll", "concentrate",
+    "infused pre-roll", "solventless concentrate",
+    "vape cartridge"
+}
+
+def display_group_column(df):
+    """
+    Categorical color / grouping key per row: Lineage for CLASSIC_TYPES,
+    otherwise PARAPHERNALIA, CBD (CBD Blend) or MIXED by strain, falling
+    back to Lineage.  Keys LINEAGE_COLOR_MAP and the lineage sort orders.
+    """
+    def text(col):
+        if col not in df.columns:
+            return pd.Series("None", index=df.index)
+        return df[col].astype(str)
+
+    ptype = text("Product Type*").str.strip().str.lower()
+    lineage = text("Lineage").str.upper()
+    strain = text("Product Strain")
+    groups = np.select(
+        [ptype.isin(CLASSIC_TYPES), ptype == "paraphernalia",
+         strain == "CBD Blend", strain == "Mixed"],
+        [lineage, "PARAPHERNALIA", "CBD", "MIXED"],
+        default=lineage,
+    )
+    return pd.Series(groups, index=df.index, dtype="category")
+
+def lineage_sort_codes(groups, order):
+    """Position of each DisplayGroup value in *order* (len(order) if absent)."""
+    codes = pd.Categorical(groups, categories=order).codes.astype(np.int64)
+    codes[codes < 0] = len(order)
+    return codes
+
+def norm_column(df, col):
+    """normalize() applied to df[col]: the _norm_ helper if present, else computed per distinct value."""
+    helper = f"_norm_{col}"
+    if helper in df.columns:
+        return df[helper]
+    # once per distinct value; these columns only hold a few hundred
+    return _map_distinct(df[col].astype(str), normalize, "nan")
+
+
+# ------------------ Preprocessed Export Cache ------------------
+# Bump PREPROCESS_VERSION whenever clean_posabit_frame's output changes so
+# stale cache entries are never served.
+PREPROCESS_VERSION = 4
+PREPROCESS_CACHE_MAX_BYTES = 256 * 1024 * 1024
+
+def app_cache_dir():
+    """Per-user cache folder for AGT Label Generator."""
+    system = platform.system()
+    if system == "Windows":
+        base = os.environ.get("LOCALAPPDATA", os.path.expanduser("~"))
+    elif system == "Darwin":
+        base = os.path.join(os.path.expanduser("~"), "Library", "Caches")
+    else:
+        base = os.environ.get("XDG_CACHE_HOME", os.path.join(os.path.expanduser("~"), ".cache"))
+    return os.path.join(base, "AGTLabelGenerator")
+
+PREPROCESS_CACHE_DIR = os.path.join(app_cache_dir(), "preprocessed")
+
+def _file_digest(file_path, block_size=1 << 20):
+    h = hashlib.blake2b(digest_size=16)
+    with open(file_path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            h.update(block)
+    return h.hexdigest()
+
+def preprocess_cache_path(file_path, columns=None):
+    """
+    Cache entry for *file_path*: keyed by content hash, preprocessing
+    version and (for projected reads) the column set.
+    """
+    variant = "full"
+    if columns is not None:
+        variant = hashlib.blake2b("\0".join(sorted(columns)).encode(), digest_size=4).hexdigest()
+    return os.path.join(
+        PREPROCESS_CACHE_DIR,
+        f"{_file_digest(file_path)}-v{PREPROCESS_VERSION}-{variant}.pkl"
+    )
+
+def _read_cached_frame(cache_path):
+    if not os.path.exists(cache_path):
+        return None
+    try:
+        df = pd.read_pickle(cache_path)
+        os.utime(cache_path)  # mark as recently used for eviction
+        return df
+    except Exception as e:
+        logging.warning("Dropping unreadable cache entry %s: %s", cache_path, e)
+        try:
+            os.remove(cache_path)
+        except OSError:
+            pass
+        return None
+
+def _pickle_atomic(obj, path):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    pd.to_pickle(obj, tmp)
+    os.replace(tmp, path)
+
+def _write_cached_frame(df, cache_path):
+    _pickle_atomic(df, cache_path)
+    evict_preprocess_cache()
+
+def evict_preprocess_cache(max_bytes=None):
+    """Delete least-recently-used entries until the cache fits in *max_bytes*."""
+    max_bytes = PREPROCESS_CACHE_MAX_BYTES if max_bytes is None else max_bytes
+    try:
+        entries = [e for e in os.scandir(PREPROCESS_CACHE_DIR) if e.name.endswith(".pkl")]
+    except FileNotFoundError:
+        return
+    entries = sorted(((e.stat().st_mtime, e.stat().st_size, e.path) for e in entries), reverse=True)
+    total = 0
+    for _, size, path in entries:
+        total += size
+        if total > max_bytes:
             try:
-                v = float(s)
-                return f"${int(v)}" if v.is_integer() else f"${v:.2f}"
-            except:
-                return f"${s}"
-        df["Price"] = df["Price"].apply(lambda x: format_p(x) if pd.notnull(x) else "")
-        df["Price"] = df["Price"].astype("string")
+                os.remove(path)
+            except OSError:
+                pass
+
+# ------------------ Incremental Ingest ------------------
+# The derived (pre-finalize) rows of the last ingest, indexed by the hash of
+# the raw row they came from, plus the hashes of rows derive dropped (samples).
+# A new export only re-derives rows whose hash isn't in either; the rest are
+# copied across.
+INGEST_SNAPSHOT_PATH = os.path.join(app_cache_dir(), "ingest_snapshot.pkl")
+_INGEST_SNAPSHOT = None
+_INGEST_LOCK = threading.Lock()  # the watcher may ingest while the GUI does
+
+def _load_ingest_snapshot():
+    global _INGEST_SNAPSHOT
+    if _INGEST_SNAPSHOT is None and os.path.exists(INGEST_SNAPSHOT_PATH):
+        try:
+            _INGEST_SNAPSHOT = pd.read_pickle(INGEST_SNAPSHOT_PATH)
+        except Exception as e:
+            logging.warning("Ignoring unreadable ingest snapshot: %s", e)
+    return _INGEST_SNAPSHOT
 
-    # 14) Special pre-roll Ratio logic
-    def process_ratio(row):
-        t = str(row.get("Product Type*", "")).strip().lower()
-        if t in ["pre-roll", "infused pre-roll"]:
-            parts = str(row.get("Ratio", "")).split(" - ")
-            if len(parts) >= 3:
-                new = " - ".join(parts[2:]).strip()
-            elif len(parts) == 2:
-                new = parts[1].strip()
-            else:
-                new = parts[0].strip()
-            return f" - {new}" if not new.startswith(" - ") else new
-        return row.get("Ratio", "")
-        # … SPECIAL pre-roll Ratio logic ────────────────────────────────
-    df["Ratio"] = df.apply(process_ratio, axis=1)
+def ingest_incremental(raw):
+    """
+    Same result as clean_posabit_frame(raw), but rows that were already
+    derived by the previous ingest are reused instead of recomputed, so a
+    fresh export costs time proportional to the rows that changed.
+    """
+    with _INGEST_LOCK:
+        return _ingest_incremental(raw)
+
+def _ingest_incremental(raw):
+    global _INGEST_SNAPSHOT
+    raw = _coerce_text_columns(raw).drop_duplicates()
+    hashes = pd.util.hash_pandas_object(raw, index=False).to_numpy()
+    if len(np.unique(hashes)) != len(hashes):
+        # 64-bit collision; not worth being clever about
+        return finalize_posabit_frame(derive_posabit_rows(raw))
+    raw.index = hashes
+
+    key = (PREPROCESS_VERSION, tuple(raw.columns))
+    snapshot = _load_ingest_snapshot()
+    if snapshot is not None and snapshot["key"] == key:
+        previous = snapshot["rows"]
+        reused = np.isin(hashes, previous.index.to_numpy())
+        known = reused | np.isin(hashes, snapshot["dropped"])
+    else:
+        previous, known = None, np.zeros(len(hashes), dtype=bool)
+
+    fresh = derive_posabit_rows(raw[~known].copy())
+    dropped = np.setdiff1d(hashes[~known], fresh.index.to_numpy())
+    if previous is not None:
+        dropped = np.union1d(dropped, np.intersect1d(snapshot["dropped"], hashes))
+    rows = fresh if previous is None else pd.concat([previous.loc[hashes[reused]], fresh])
+    # back to source order; rows dropped by derive (samples) stay dropped
+    rows = rows.loc[hashes[np.isin(hashes, rows.index.to_numpy())]]
+    logging.debug("Incremental ingest: %d of %d rows re-derived", (~known).sum(), len(hashes))
+
+    _INGEST_SNAPSHOT = {"key": key, "rows": rows, "dropped": dropped}
+    _IO_POOL.submit(_pickle_atomic, _INGEST_SNAPSHOT, INGEST_SNAPSHOT_PATH) \
+        .add_done_callback(_log_background_failure)
+    return finalize_posabit_frame(rows)
+
+def load_clean_frame(file_path, columns=None):
+    """
+    Return the cleaned frame for *file_path*, served from the on-disk cache
+    when this exact export has been preprocessed before.  *columns* is
+    passed through to read_posabit_export.
+    """
+    try:
+        cache_path = preprocess_cache_path(file_path, columns)
+    except OSError as e:
+        logging.warning("Preprocess cache unavailable for %s: %s", file_path, e)
+        return clean_posabit_frame(read_posabit_export(file_path, columns))
+
+    df = _read_cached_frame(cache_path)
+    if df is not None:
+        logging.debug("Preprocess cache hit: %s", cache_path)
+        return df
+
+    df = ingest_incremental(read_posabit_export(file_path, columns))
+    _IO_POOL.submit(_write_cached_frame, df.copy(), cache_path).add_done_callback(_log_background_failure)
+    return df
 
-    # … (suffix-building and Excel output) …
+
+def preprocessed_export_path(filters=None, tag=""):
+    """~/Downloads/<date>_<suffix><tag>.xlsx for a cleaned sheet."""
     today = datetime.datetime.today().strftime("%Y-%m-%d")
     suffix = "all"  # or built from `filters`
-    out = os.path.join(
+    return os.path.join(
         os.path.expanduser("~"),
         "Downloads",
-        f"{today}_{suffix}.xlsx"
+        f"{today}_{suffix}{tag}.xlsx"
     )
+
+def export_preprocessed(df, out):
     df.to_excel(out, index=False, engine="openpyxl")
     return out
 
+def _log_background_failure(fut):
+    if fut.exception() is not None:
+        logging.error("Background write failed: %s", fut.exception())
+
+def preprocess_excel(file_path, filters=None, return_df=False, export=True):
+    """
+    Read and clean a POSaBit export.
+
+    By default the cleaned sheet is written to ~/Downloads/<date>_all.xlsx and
+    that path is returned.  With return_df=True the typed DataFrame is handed
+    back directly instead; the .xlsx copy (if export=True) is then written in
+    the background on _IO_POOL so the caller never pays for it.
+
+    The in-memory mode only reads PIPELINE_COLUMNS (and reuses the frame the
+    Downloads watcher already built, if any), so its background copy goes to
+    <date>_all_loaded.xlsx.  <date>_all.xlsx keeps every column and is left
+    to the .xlsx mode, because edit_data_manually hands that sheet to the
+    user to edit and a late background write must not replace it.
+    """
+    df = take_preingested(file_path) if return_df else None
+    if df is None:
+        df = load_clean_frame(file_path, PIPELINE_COLUMNS if return_df else None)
+    if not return_df:
+        return export_preprocessed(df, preprocessed_export_path(filters))
+    out = preprocessed_export_path(filters, "_loaded")
+    if export:
+        # copy: the caller is free to mutate the frame it gets back
+        _IO_POOL.submit(export_preprocessed, df.copy(), out).add_done_callback(_log_background_failure)
+    return df
+
+
+# ------------------ Downloads Watcher ------------------
+# Notices new POSaBit exports landing in ~/Downloads while the app is open
+# and preprocesses them on the worker pool, so loading one later is just a
+# dictionary lookup.  inotify on Linux, an mtime/size poll everywhere else.
+DOWNLOADS_DIR = os.path.join(os.path.expanduser("~"), "Downloads")
+DOWNLOADS_POLL_SECONDS = 2.0
+PREINGEST_KEEP = 2  # cleaned frames kept around (newest first)
+
+_IN_CLOSE_WRITE = 0x00000008
+_IN_MOVED_TO = 0x00000080
+
+_PREINGESTED = {}  # path -> ((mtime_ns, size), Future of the cleaned frame)
+_PREINGEST_LOCK = threading.Lock()
+
+def latest_posabit_export(folder=None):
+    """Newest "A Greener Today*" export in *folder* (default ~/Downloads), or None."""
+    folder = folder or DOWNLOADS_DIR
+    try:
+        entries = [e for e in os.scandir(folder) if e.is_file() and is_posabit_export(e.name)]
+    except OSError:
+        return None
+    if not entries:
+        return None
+    return max(entries, key=lambda e: e.stat().st_mtime).path
+
+def _export_stamp(path):
+    st = os.stat(path)
+    return (st.st_mtime_ns, st.st_size)
+
+def preingest_export(path, on_ready=None):
+    """
+    Parse and clean *path* on the worker pool unless this exact version of
+    the file is already done or in flight.  *on_ready(path)* is called from
+    the worker thread once the frame is ready.
+    """
+    try:
+        stamp = _export_stamp(path)
+    except OSError:
+        return None
+    with _PREINGEST_LOCK:
+        entry = _PREINGESTED.get(path)
+        if entry is not None and entry[0] == stamp:
+            return entry[1]
+        fut = executor.submit(load_clean_frame, path, PIPELINE_COLUMNS)
+        _PREINGESTED.pop(path, None)
+        _PREINGESTED[path] = (stamp, fut)
+        while len(_PREINGESTED) > PREINGEST_KEEP:
+            del _PREINGESTED[next(iter(_PREINGESTED))]
+    logging.debug("Pre-ingesting %s", path)
+
+    def _done(f):
+        if f.exception() is not None:
+            logging.error("Pre-ingest of %s failed: %s", path, f.exception())
+        elif on_ready is not None:
+            on_ready(path)
+    fut.add_done_callback(_done)
+    return fut
+
+def take_preingested(path):
+    """
+    The cleaned frame for *path* if the watcher has (or is busy producing)
+    it for the file as it is on disk now; None otherwise.  Returns a copy so
+    the caller can mutate it freely.
+    """
+    with _PREINGEST_LOCK:
+        entry = _PREINGESTED.get(path)
+    if entry is None:
+        return None
+    try:
+        if _export_stamp(path) != entry[0]:
+            return None
+        return entry[1].result().copy()
+    except Exception as e:
+        logging.warning("Discarding pre-ingested %s: %s", path, e)
+        return None
+
+def _inotify_names(folder):
+    """Yield names of files written or moved into *folder* (Linux inotify via ctypes)."""
+    import ctypes, struct
+    libc = ctypes.CDLL(None, use_errno=True)
+    fd = libc.inotify_init1(os.O_CLOEXEC)
+    if fd < 0:
+        raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+    try:
+        if libc.inotify_add_watch(fd, os.fsencode(folder), _IN_CLOSE_WRITE | _IN_MOVED_TO) < 0:
+            raise OSError(ctypes.get_errno(), f"inotify_add_watch failed for {folder}")
+        while True:
+            buf = os.read(fd, 64 * 1024)
+            pos = 0
+            while pos < len(buf):
+                _wd, _mask, _cookie, length = struct.unpack_from("iIII", buf, pos)
+                yield os.fsdecode(buf[pos + 16:pos + 16 + length].rstrip(b"\0"))
+                pos += 16 + length
+    finally:
+        os.close(fd)
+
+def _poll_exports(folder, poll_seconds):
+    """Yield paths of exports whose mtime/size changed and then held still for one poll."""
+    import time
+
+    def scan():
+        try:
+            return {e.path: (e.stat().st_mtime_ns, e.stat().st_size)
+                    for e in os.scandir(folder) if e.is_file() and is_posabit_export(e.name)}
+        except OSError:
+            return {}
+
+    seen, pending = scan(), {}
+    while True:
+        time.sleep(poll_seconds)
+        current = scan()
+        for path, stamp in current.items():
+            if pending.get(path) == stamp:
+                del pending[path]
+                yield path
+            elif seen.get(path) != stamp:
+                pending[path] = stamp  # still downloading, maybe
+        seen = current
+
+def _watch_downloads(folder, on_ready, poll_seconds):
+    if platform.system() == "Linux":
+        try:
+            for name in _inotify_names(folder):
+                if is_posabit_export(name):
+                    preingest_export(os.path.join(folder, name), on_ready)
+        except (OSError, AttributeError) as e:
+            logging.warning("inotify unavailable (%s); polling %s instead", e, folder)
+    for path in _poll_exports(folder, poll_seconds):
+        preingest_export(path, on_ready)
+
+def start_downloads_watcher(on_ready=None, folder=None, poll_seconds=None):
+    """
+    Watch *folder* (default ~/Downloads) on a daemon thread and pre-ingest
+    every new POSaBit export.  *on_ready(path)* runs on a worker thread, so
+    GUI callers should bounce it through root.after.
+    """
+    folder = folder or DOWNLOADS_DIR
+    if not os.path.isdir(folder):
+        logging.debug("Not watching %s: no such folder", folder)
+        return None
+    thread = threading.Thread(
+        target=_watch_downloads,
+        args=(folder, on_ready, poll_seconds or DOWNLOADS_POLL_SECONDS),
+        name="downloads-watcher",
+        daemon=True,
+    )
+    thread.start()
+    return thread
+
 
 def chunk_records(records, chunk_size=4):
     """Yield successive n‑sized chunks from the list of records."""
@@ -1373,6 +2005,7 @@ def process_chunk(args):
     """
     Processes a chunk of records and returns a DOCX document as a bytes buffer.
     """
+    from docxtpl import InlineImage
     from io import BytesIO
     from docx import Document
     from docxtpl import DocxTemplate
@@ -1510,7 +2143,8 @@ def process_chunk(args):
                 weight_val = float(row.get("Weight*", ""))
             except Exception:
                 weight_val = None
-            units_val = row.get("Units", "").lower()    # e.g. 'g' or 'oz'
+            units_val = row.get("Units", "")
+            units_val = units_val.lower() if isinstance(units_val, str) else ""    # e.g. 'g' or 'oz'
 
             # ── NEW: convert certain gram‑based products to oz ─────────────
             edible_types = {
@@ -1667,34 +2301,81 @@ def process_chunk(args):
     return final_buffer.getvalue()
 
 # ------------------ Run Full Process Functions ------------------
-def filter_column(df, column, var):
-    filter_val = normalize(var.get())
-    if filter_val != "all" and column in df.columns:
-        return df[df[column].astype(str).apply(normalize) == filter_val]
+# A filter value may name several values, "A; B", meaning A or B.
+MULTI_VALUE_SEP = "; "
+
+def split_filter_value(value):
+    """The values picked in a filter ("A; B" or a list), without "All"."""
+    parts = value if isinstance(value, (list, tuple)) else str(value).split(MULTI_VALUE_SEP.strip())
+    return [p.strip() for p in map(str, parts) if p.strip() and normalize(p) != "all"]
+
+def filter_values(value):
+    """Sorted normalized values picked in a filter; [] means "All"."""
+    return sorted({normalize(p) for p in split_filter_value(value)})
+
+# Output filenames name the active filters; a multi-value filter is
+# summarized ("3 vendors") and the whole suffix is capped so long picks
+# can't push the path past the filesystem's 255-byte name limit.
+FILENAME_FILTER_KEYS = {
+    "product_type": "types", "lineage": "lineages", "brand": "brands",
+    "vendor": "vendors", "weight": "weights", "strain": "strains",
+}
+FILENAME_SUFFIX_MAX = 80
+
+def filter_filename_suffix(filters, clean=None):
+    """
+    Filename-safe summary of the non-"All" filters, joined by "_" ("all"
+    if none).  *clean* turns one part into filename text (default
+    sanitize_filename).
+    """
+    clean = clean or sanitize_filename
+    parts = []
+    for key, noun in FILENAME_FILTER_KEYS.items():
+        values = split_filter_value(filters.get(key, "All"))
+        if len(values) > 1:
+            parts.append(clean(f"{len(values)} {noun}"))
+        elif values:
+            parts.append(clean(values[0]))
+    return "_".join(p for p in parts if p)[:FILENAME_SUFFIX_MAX] or "all"
+
+def filter_by_value(df, column, value):
+    filter_vals = filter_values(value)
+    if filter_vals and column in df.columns:
+        return df[norm_column(df, column).isin(filter_vals).to_numpy()]
     return df
 
+def filter_column(df, column, var):
+    return filter_by_value(df, column, var.get())
+
+def current_filters():
+    """The GUI's filter values, keyed like TAG_FILTER_COLUMNS, plus "in_stock" and the ranges."""
+    return {
+        "product_type": product_type_filter_var.get(),
+        "lineage":      lineage_filter_var.get(),
+        "brand":        product_brand_filter_var.get(),
+        "vendor":       vendor_filter_var.get(),
+        "weight":       weight_filter_var.get(),
+        "strain":       product_strain_filter_var.get(),
+        "in_stock":     quantity_filter_var.get(),
+        "price_range":  slider_range("price_range"),
+        "weight_range": slider_range("weight_range")
+    }
+
 from io import BytesIO
-from docx import Document
-from docxcompose.composer import Composer
 import datetime
 import os
 import pandas as pd
 from tkinter import messagebox
 
-from io import BytesIO
-from docx import Document
-from docx.shared import Inches
-from docx.enum.table import WD_ROW_HEIGHT_RULE
-
-from docx.enum.table import WD_ROW_HEIGHT_RULE
-from docx.shared    import Inches
-
 def process_name_chunk(args):
     """
     Given a chunk of records, a 3×3 template buffer, and the orientation,
     build a back‐side page with product names.  For vertical tags we
     swap to 2.5"×3.5" cells.
     """
+    from docx import Document
+    from docx.shared import Inches
+    from docx.enum.table import WD_ROW_HEIGHT_RULE
     chunk, template_buffer, orientation = args
 
     buf = BytesIO(template_buffer.getvalue())
@@ -1739,6 +2420,10 @@ def add_vendor_back_pages(master_doc, records):
     After each front chunk (3×3) in master_doc, append a back page
     with the same exact table dimensions, populated with Vendor/Brand.
     """
+    from docx import Document
+    from docx.shared import Inches
+    from docx.enum.table import WD_ROW_HEIGHT_RULE
+    from docxcompose.composer import Composer
     # first, grab the already-expanded 3×3 grid from the front
     # assume you expanded once with expand_template_to_3x3_fixed()
     # and that you passed that buffer in as `fixed_buf`
@@ -1773,67 +2458,63 @@ def add_vendor_back_pages(master_doc, records):
         composer.append(back_doc)
 
 
-# ─── Main generation function ─────────────────────────────────────
-def run_full_process_by_group(template_type, group_by_fields=["Lineage", "Product Strain"]):
-    import io, os, datetime
+# ------------------ Tag Sheet Rendering ------------------
+# Tk-free halves of the run_full_process_* buttons, shared with the
+# --headless command line.  Each takes an already filtered DataFrame and
+# returns the composed Document, or None when there was nothing to render.
+TAG_FILTER_COLUMNS = {
+    "product_type": "Product Type*",
+    "lineage":      "Lineage",
+    "brand":        "Product Brand",
+    "vendor":       "Vendor",
+    "weight":       "CombinedWeight",
+    "strain":       "Product Strain",
+}
+
+# Dropdowns where several values can be picked at once (a union).
+MULTI_SELECT_FILTERS = ("vendor", "brand", "product_type", "lineage")
+MULTI_SELECT_COLUMNS = {TAG_FILTER_COLUMNS[key] for key in MULTI_SELECT_FILTERS}
+
+# (lo, hi) range filters over the numeric columns finalize_posabit_frame adds.
+RANGE_FILTER_COLUMNS = {
+    "price_range":  "PriceValue",
+    "weight_range": "WeightGrams",
+}
+
+LINEAGE_ORDER = [
+    "SATIVA", "INDICA", "HYBRID", "HYBRID/SATIVA",
+    "HYBRID/INDICA", "CBD", "MIXED", "PARAPHERNALIA"
+]
+LINEAGE_RANK = {lin: i for i, lin in enumerate(LINEAGE_ORDER)}
+
+def apply_filters(df, filters):
+    """
+    Keep the rows matching every non-"All" value in *filters* (keys as in
+    TAG_FILTER_COLUMNS), only in-stock rows if filters["in_stock"], and
+    only rows inside any (lo, hi) given for RANGE_FILTER_COLUMNS.
+    """
+    if filters.get("in_stock"):
+        df = df[stock_mask(df)]
+    for key, column in RANGE_FILTER_COLUMNS.items():
+        if filters.get(key) and column in df.columns:
+            lo, hi = filters[key]
+            values = df[column]
+            df = df[values.between(-np.inf if lo is None else lo, np.inf if hi is None else hi)]
+    for key, column in TAG_FILTER_COLUMNS.items():
+        df = filter_by_value(df, column, filters.get(key, "All"))
+    return df
+
+def render_group_tags(df, template_type, scale_factor=1.0, vendor_back=False):
+    """3×3 horizontal/vertical tag sheets, sorted by lineage then name."""
+    import io
     from docx import Document
     from docxcompose.composer import Composer
-    splash = show_splash2(root)
 
-    # 1) Get & validate file
-    file_path = file_entry.get()
-    if not file_path:
-        messagebox.showerror("Error", "Please select a data file.")
-        return
+    # assign an ordering key, secondary sort by name
+    groups = df["DisplayGroup"] if "DisplayGroup" in df.columns else display_group_column(df)
+    df = df.assign(_lin_order=lineage_sort_codes(groups, LINEAGE_ORDER))
+    df = df.sort_values(by=["_lin_order", "Product Name*"]).drop(columns=["_lin_order"])
 
-    # 2) Preprocess & reload
-    filters = {
-        "product_type": product_type_filter_var.get(),
-        "lineage":      lineage_filter_var.get(),
-        "brand":        product_brand_filter_var.get(),
-        "vendor":       vendor_filter_var.get(),
-        "weight":       weight_filter_var.get(),
-        "strain":       product_strain_filter_var.get()
-    }
-    
-    prepped = preprocess_excel(file_path, filters)
-    global global_df
-    global_df = pd.read_excel(prepped, engine="openpyxl")
-    df = global_df.copy()
-
-    # 3) Apply dropdown filters
-    df = filter_column(df, "Product Type*", product_type_filter_var)
-    df = filter_column(df, "Lineage",         lineage_filter_var)
-    df = filter_column(df, "Product Brand",   product_brand_filter_var)
-    df = filter_column(df, "Vendor",          vendor_filter_var)
-    df = filter_column(df, "CombinedWeight",  weight_filter_var)
-    df = filter_column(df, "Product Strain",  product_strain_filter_var)
-    
-    LINEAGE_ORDER = [
-        "SATIVA", "INDICA", "HYBRID", "HYBRID/SATIVA",
-        "HYBRID/INDICA", "CBD", "MIXED", "PARAPHERNALIA"
-    ]
-
-    # assign an ordering key
-    df["_lin_order"] = df["Lineage"].apply(
-        lambda x: LINEAGE_ORDER.index(x) if x in LINEAGE_ORDER else len(LINEAGE_ORDER)
-    )
-    # secondary sort by name (optional)
-    df = df.sort_values(by=["_lin_order", "Product Name*"])
-    # drop the helper column
-    df = df.drop(columns=["_lin_order"])
-
-    records = df.to_dict(orient="records")
-
-
-    # 4) Limit to checked Selected Tags
-    sel = [n for n,v in selected_tags_vars.items() if v.get()]
-    if not sel:
-        messagebox.showerror("Error", "No selected tags are checked!")
-        return
-    df = df[df["Product Name*"].isin(sel)]
-
-    # 5) Choose template & scheme
     if template_type == "horizontal":
         tpl_path    = resource_path("templates/horizontal.docx")
         orientation = "horizontal"
@@ -1843,49 +2524,864 @@ def run_full_process_by_group(template_type, group_by_fields=["Lineage", "Produc
         orientation = "vertical"
         scheme      = FONT_SCHEME_VERTICAL
 
-    # 6) Expand to fixed 3×3
-    # 6) Expand the 3×3 template once
+    # expand the 3×3 template once, then render front & back per chunk
     fixed_buf = expand_template_to_3x3_fixed(tpl_path)
-
-    # 7) Render front & back for each chunk
-    records = df.to_dict("records")
-    # inside run_full_process_by_group(...)
     bytes_list = []
-    for chunk in chunk_records(records, chunk_size=9):
-        # front side
-        front_bytes = process_chunk((chunk, fixed_buf, scheme, orientation, SCALE_FACTOR))
-        bytes_list.append(front_bytes)
-
-        # back side (same grid but sized per orientation)
-        if print_vendor_back_var.get():
-            back_bytes = process_name_chunk((chunk, fixed_buf, orientation))
-            bytes_list.append(back_bytes)
-
-
+    for chunk in chunk_records(df.to_dict("records"), chunk_size=9):
+        bytes_list.append(process_chunk((chunk, fixed_buf, scheme, orientation, scale_factor)))
+        if vendor_back:
+            bytes_list.append(process_name_chunk((chunk, fixed_buf, orientation)))
     if not bytes_list:
-        messagebox.showerror("Error", "No documents generated.")
-        return
+        return None
 
-    # 8) Stitch into a master_doc
     master_doc = Document(io.BytesIO(bytes_list[0]))
     composer   = Composer(master_doc)
     for b in bytes_list[1:]:
         composer.append(Document(io.BytesIO(b)))
-
-    # 9) Final spacing
     reapply_table_cell_spacing_only(master_doc, spacing_inches=0.03)
+    return master_doc
+
+def render_mini_tags(df, scale_factor=1.0):
+    """5×6 mini tag sheets, rendered on a process pool, blank page after each sheet."""
+    from docx import Document
+    from docxcompose.composer import Composer
+    from concurrent.futures import ProcessPoolExecutor
+
+    if "Price" in df.columns:
+        df = df.assign(Price=df["Price"].apply(lambda x: x.lstrip("'") if isinstance(x, str) else x))
+    records  = df.to_dict(orient="records")
+    base_buf = expand_template_to_4x5_fixed_scaled(
+        resource_path("templates/mini.docx"),
+        scale_factor=scale_factor
+    )
+
+    def chunk_records_mini(rec, size=30):      # bigger chunks = faster
+        for i in range(0, len(rec), size):
+            yield rec[i:i+size]
+
+    work_items = [
+        (chunk, base_buf, FONT_SCHEME_MINI, "mini", scale_factor)
+        for chunk in chunk_records_mini(records)
+    ]
+    if not work_items:
+        return None
+    with ProcessPoolExecutor(max_workers=os.cpu_count()) as exe:
+        docs_bytes = list(exe.map(process_chunk, work_items))
+
+    docs = [Document(BytesIO(b)) for b in docs_bytes if b]
+    if not docs:
+        return None
+
+    blank_doc = Document()  # completely empty document for a blank “back-side” page
+    master_doc = docs[0]
+    composer   = Composer(master_doc)
+    # start at 1 so we don’t prepend a blank in front of the very first
+    for sub_doc in docs[1:]:
+        composer.append(sub_doc)
+        composer.append(blank_doc)
+    reapply_table_cell_spacing_only(master_doc)
+    return master_doc
+
+def render_inventory_slips(df):
+    """2×2 inventory slips, four records per page."""
+    from docxtpl import DocxTemplate
+    from docx import Document
+    from docxcompose.composer import Composer
+
+    pages = []
+    for chunk in chunk_records(df.to_dict(orient="records"), 4):
+        tpl = DocxTemplate(INVENTORY_SLIP_TEMPLATE)
+        context = {}
+
+        slot_num = 1
+        for rec in chunk:
+            product_name = rec.get("Product Name*", "")
+            barcode      = rec.get("Barcode*", "")
+            qty          = rec.get("Quantity Received*", rec.get("Quantity*", ""))
+
+            if not (product_name or barcode or qty):
+                continue
+
+            try:
+                qty = int(float(qty))
+            except (ValueError, TypeError):
+                qty = ""
+
+            context[f"Label{slot_num}"] = {
+                "ProductName":      product_name,
+                "Barcode":          barcode,
+                "AcceptedDate":     rec.get("Accepted Date", ""),
+                "QuantityReceived": qty,
+                "Vendor":           rec.get("Vendor", "")
+            }
+            slot_num += 1
+
+        # fill the rest of the 4 slots with blanks
+        for i in range(slot_num, 5):
+            context[f"Label{i}"] = {
+                "ProductName":      "",
+                "Barcode":          "",
+                "AcceptedDate":     "",
+                "QuantityReceived": "",
+                "Vendor":           ""
+            }
+
+        tpl.render(context)
+        buf = BytesIO()
+        tpl.save(buf)
+        pages.append(Document(buf))
+
+    if not pages:
+        return None
+    master_doc = pages[0]
+    composer   = Composer(master_doc)
+    for page in pages[1:]:
+        composer.append(page)
+    return master_doc
+
+def transfer_records_frame(payload):
+    """Inventory-slip rows from an inventory transfer JSON payload."""
+    items       = payload.get("inventory_transfer_items", [])
+    vendor_meta = f"{payload.get('from_license_number','')} – {payload.get('from_license_name','')}"
+    raw_date    = payload.get("est_arrival_at", "").split("T")[0]
+
+    records = []
+    for itm in items:
+        records.append({
+            "Product Name*":      itm.get("product_name", ""),
+            "Barcode*":           itm.get("inventory_id", ""),
+            "Quantity Received*": itm.get("qty", ""),
+            "Accepted Date":      raw_date,
+            "Vendor":             vendor_meta,
+        })
+    return pd.DataFrame(records)
+
+
+# ------------------ Product Store ------------------
+# Optional SQLite copy of every loaded export, one row per product, with the
+# filter columns indexed per source file.  The GUI filters the loaded export
+# through it once the background write has landed, and query_products can
+# look across weeks of exports / several stores without loading them.
+# Set AGT_PRODUCT_STORE=0 to turn it off.
+PRODUCT_STORE_ENABLED = os.environ.get("AGT_PRODUCT_STORE", "1") != "0"
+PRODUCT_STORE_PATH = os.path.join(app_cache_dir(), "products.sqlite3")
+PRODUCT_STORE_KEEP_SOURCES = 60  # exports kept, oldest dropped first
+
+# SQL column -> frame column; facet columns also get a normalized copy
+# (<col>_norm, same semantics as normalize()) that the indexes cover.
+PRODUCT_STORE_COLUMNS = {
+    "product_name":    "Product Name*",
+    "description":     "Description",
+    "product_type":    "Product Type*",
+    "lineage":         "Lineage",
+    "brand":           "Product Brand",
+    "vendor":          "Vendor",
+    "strain":          "Product Strain",
+    "combined_weight": "CombinedWeight",
+    "price":           "Price",
+    "quantity":        "Quantity*",
+}
+STORE_FACETS = {
+    "product_type": "product_type",
+    "lineage":      "lineage",
+    "brand":        "brand",
+    "vendor":       "vendor",
+    "weight":       "combined_weight",
+    "strain":       "strain",
+}  # TAG_FILTER_COLUMNS key -> SQL column
+
+_STORE_LOCAL = threading.local()
+_STORE_GENERATION = None  # DATA_GENERATION whose rows are in the store
+
+def _store_connection():
+    """Per-thread connection (the writer runs on _IO_POOL, readers on Tk)."""
+    import sqlite3
+    conn = getattr(_STORE_LOCAL, "conn", None)
+    if conn is None:
+        os.makedirs(os.path.dirname(PRODUCT_STORE_PATH), exist_ok=True)
+        conn = sqlite3.connect(PRODUCT_STORE_PATH, timeout=30)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        columns = ",\n".join(
+            [f"{col} TEXT" for col in PRODUCT_STORE_COLUMNS] +
+            [f"{col}_norm TEXT" for col in STORE_FACETS.values()]
+        )
+        conn.executescript(f"""
+            CREATE TABLE IF NOT EXISTS products (
+                source TEXT NOT NULL,
+                row_id INTEGER NOT NULL,
+                {columns},
+                PRIMARY KEY (source, row_id)
+            );
+            CREATE TABLE IF NOT EXISTS sources (
+                source TEXT PRIMARY KEY,
+                row_count INTEGER,
+                loaded_at TEXT
+            );
+        """)
+        for col in STORE_FACETS.values():
+            conn.execute(f"CREATE INDEX IF NOT EXISTS ix_products_{col} ON products(source, {col}_norm)")
+        conn.commit()
+        _STORE_LOCAL.conn = conn
+    return conn
+
+def store_products(df, source, generation=None):
+    """Replace *source*'s rows in the store with *df* (row_id = position in df)."""
+    global _STORE_GENERATION
+    values = {}
+    for col, frame_col in PRODUCT_STORE_COLUMNS.items():
+        if frame_col in df.columns:
+            values[col] = _map_distinct(df[frame_col], str, None).to_numpy()
+        else:
+            values[col] = np.full(len(df), None, dtype=object)
+    for col in STORE_FACETS.values():
+        frame_col = PRODUCT_STORE_COLUMNS[col]
+        if frame_col in df.columns:
+            values[f"{col}_norm"] = norm_column(df, frame_col).to_numpy(dtype=object)
+        else:
+            values[f"{col}_norm"] = np.full(len(df), None, dtype=object)
+    names = list(values)
+    rows = zip([source] * len(df), range(len(df)), *(values[n].tolist() for n in names))
+
+    conn = _store_connection()
+    with conn:
+        conn.execute("DELETE FROM products WHERE source = ?", (source,))
+        conn.executemany(
+            f"INSERT INTO products (source, row_id, {', '.join(names)}) "
+            f"VALUES ({', '.join('?' * (len(names) + 2))})",
+            rows
+        )
+        conn.execute(
+            "INSERT OR REPLACE INTO sources VALUES (?, ?, ?)",
+            (source, len(df), datetime.datetime.now().isoformat(timespec="seconds"))
+        )
+        stale = [s for (s,) in conn.execute(
+            "SELECT source FROM sources ORDER BY loaded_at DESC LIMIT -1 OFFSET ?",
+            (PRODUCT_STORE_KEEP_SOURCES,)
+        )]
+        for s in stale:
+            conn.execute("DELETE FROM products WHERE source = ?", (s,))
+            conn.execute("DELETE FROM sources WHERE source = ?", (s,))
+    if generation is not None:
+        _STORE_GENERATION = generation
+    logging.debug("Product store: %d rows for %s", len(df), source)
+
+def _store_where(filters, source=None, prefix=""):
+    clauses, params = [], []
+    if source is not None:
+        clauses.append(f"{prefix}source = ?")
+        params.append(source)
+    for key, value in filters.items():
+        values = filter_values(value) if key in STORE_FACETS else []
+        if values:
+            marks = ", ".join("?" * len(values))
+            clauses.append(f"{prefix}{STORE_FACETS[key]}_norm IN ({marks})")
+            params.extend(values)
+    return (" WHERE " + " AND ".join(clauses)) if clauses else "", params
+
+def store_filter_rows(filters, source):
+    """Row ids (positions in the loaded frame) of *source* matching *filters*."""
+    where, params = _store_where(filters, source)
+    cur = _store_connection().execute(f"SELECT row_id FROM products{where} ORDER BY row_id", params)
+    return np.fromiter((r for (r,) in cur), dtype=np.int64)
+
+def store_facet_values(key, filters, source=None):
+    """Distinct display values of facet *key* among rows matching *filters*."""
+    col = STORE_FACETS[key]
+    where, params = _store_where(filters, source)
+    cur = _store_connection().execute(f"SELECT DISTINCT {col} FROM products{where}", params)
+    return sorted(v for (v,) in cur if v is not None)
+
+def query_products(filters=None, sources=None):
+    """
+    Products matching *filters* across every stored export (or just
+    *sources*), newest export first, as a DataFrame with the frame's column
+    names plus "Source".
+    """
+    where, params = _store_where(filters or {}, prefix="p.")
+    if sources:
+        where += (" AND " if where else " WHERE ") + f"p.source IN ({', '.join('?' * len(sources))})"
+        params += list(sources)
+    cols = ", ".join(f"p.{c}" for c in PRODUCT_STORE_COLUMNS)
+    sql = (f"SELECT p.source, {cols} FROM products p JOIN sources s ON s.source = p.source"
+           f"{where} ORDER BY s.loaded_at DESC, p.row_id")
+    df = pd.read_sql_query(sql, _store_connection(), params=params)
+    return df.rename(columns={"source": "Source", **PRODUCT_STORE_COLUMNS})
+
+def _store_ready():
+    return PRODUCT_STORE_ENABLED and _STORE_GENERATION is not None and _STORE_GENERATION == DATA_GENERATION
+
+
+# ------------------ Facet Index ------------------
+# Built once per load by set_global_df: for every filter column, each row's
+# normalized value as an integer code plus, per value, the sorted array of
+# row ids holding it.  Cascading filters are then array intersections and
+# dropdown counts a bincount, without touching the DataFrame.
+_FACETS = {}
+
+def build_facet_index(df):
+    """{TAG_FILTER_COLUMNS key: {"codes", "index" (norm -> code), "rows", "labels"}}."""
+    facets = {}
+    for key, column in TAG_FILTER_COLUMNS.items():
+        if column not in df.columns:
+            continue
+        raw = df[column]
+        codes, norms = pd.factorize(norm_column(df, column).to_numpy(dtype=object))
+        codes = codes.astype(np.int32)
+        order = np.argsort(codes, kind="stable")
+        bounds = np.searchsorted(codes[order], np.arange(len(norms) + 1))
+        first = order[bounds[:-1]]  # first row holding each value
+        facets[key] = {
+            "codes":  codes,
+            "index":  {norm: code for code, norm in enumerate(norms)},
+            "rows":   [order[bounds[c]:bounds[c + 1]] for c in range(len(norms))],
+            "labels": raw.to_numpy(dtype=object)[first],  # display value per code
+        }
+    return facets
+
+def facet_rows(filters, skip=None):
+    """
+    Sorted row ids matching every active filter except *skip*, or None if
+    some filtered column has no facet (caller falls back).  Values picked
+    in one filter are a union, filters intersect.
+    """
+    picked = []
+    for key, value in filters.items():
+        values = filter_values(value) if key in TAG_FILTER_COLUMNS and key != skip else []
+        if not values:
+            continue
+        facet = _FACETS.get(key)
+        if facet is None:
+            return None
+        chosen = [facet["index"][v] for v in values if v in facet["index"]]
+        if not chosen:
+            return np.array([], dtype=np.int64)
+        wanted = np.zeros(len(facet["labels"]), dtype=bool)
+        wanted[chosen] = True
+        size = sum(len(facet["rows"][c]) for c in chosen)
+        picked.append((size, facet, chosen, wanted))
+    if not picked:
+        return np.arange(len(global_df))
+    # start from the rarest selection, then keep rows whose other codes are wanted
+    picked.sort(key=lambda p: p[0])
+    _, facet, chosen, wanted = picked[0]
+    if len(chosen) == 1:
+        rows = facet["rows"][chosen[0]]
+    else:
+        rows = np.flatnonzero(wanted[facet["codes"]])
+    for _, facet, _, wanted in picked[1:]:
+        rows = rows[wanted[facet["codes"][rows]]]
+    return rows
+
+def facet_options(key, filters):
+    """
+    (values, counts) still reachable in dropdown *key* given the other
+    filters, or None without a facet for *key*.
+    """
+    facet = _FACETS.get(key)
+    rows = facet_rows(filters, skip=key) if facet is not None else None
+    if rows is None:
+        return None
+    mask = extra_row_mask(filters)
+    if mask is not None:
+        rows = rows[mask[rows]]
+    counts = np.bincount(facet["codes"][rows], minlength=len(facet["labels"]))
+    options = [
+        (label, int(n)) for label, n in zip(facet["labels"], counts)
+        if n and not pd.isna(label)
+    ]
+    if key == "weight":
+        options.sort(key=lambda o: extract_float(str(o[0])))
+    else:
+        options.sort(key=lambda o: str(o[0]))
+    return [o[0] for o in options], [o[1] for o in options]
+
 
-    # 10) Save & open
+# ------------------ Range Index ------------------
+# Price / weight range filters.  Each numeric column is presorted once per
+# load; a (lo, hi) query is two binary searches into the sorted values and
+# the matching row ids are the slice of the sort order between them.
+_RANGES = {}
+
+def build_range_index(df):
+    """{RANGE_FILTER_COLUMNS key: (sorted values, row ids in that order)}, NaNs left out."""
+    ranges = {}
+    for key, column in RANGE_FILTER_COLUMNS.items():
+        if column not in df.columns:
+            continue
+        values = df[column].to_numpy(dtype=float, na_value=np.nan)
+        order = np.argsort(values, kind="stable")
+        order = order[~np.isnan(values[order])]
+        ranges[key] = (values[order], order)
+    return ranges
+
+def range_bounds(key):
+    """(min, max) of the loaded values for *key*, or None if it has none."""
+    values = _RANGES.get(key, (np.array([]),))[0]
+    return (float(values[0]), float(values[-1])) if len(values) else None
+
+def range_rows(key, lo=None, hi=None):
+    """Row ids (unordered) whose *key* value is within [lo, hi]; None bounds are open."""
+    values, order = _RANGES[key]
+    start = 0 if lo is None else np.searchsorted(values, lo, side="left")
+    stop = len(values) if hi is None else np.searchsorted(values, hi, side="right")
+    return order[start:stop]
+
+def extra_row_mask(filters):
+    """
+    Bool mask over global_df for the non-dropdown filters ("in_stock" and
+    the RANGE_FILTER_COLUMNS ranges), or None if none of them is active.
+    """
+    mask = stock_mask(global_df) if filters.get("in_stock") else None
+    for key in RANGE_FILTER_COLUMNS:
+        if not filters.get(key) or key not in _RANGES:
+            continue
+        inside = np.zeros(len(global_df), dtype=bool)
+        inside[range_rows(key, *filters[key])] = True
+        mask = inside if mask is None else mask & inside
+    return mask
+
+
+# ------------------ Search Index ------------------
+# Trigram index over Product Name* + Description for the Available search
+# box.  Each distinct text is split into gram ids once and remembered across
+# reloads, so set_global_df only tokenizes rows it hasn't seen before;
+# per-gram postings (sorted row ids) are rebuilt from those with numpy.
+SEARCH_COLUMNS = ("Product Name*", "Description")
+_SEARCH_INDEX = {}
+_GRAM_IDS = {}      # trigram -> id, only ever grows
+_TEXT_GRAMS = {}    # search text -> np.int32 gram ids
+
+def _search_text(value):
+    return " ".join(str(value).lower().split())
+
+def _text_grams(text):
+    ids = _TEXT_GRAMS.get(text)
+    if ids is None:
+        # the leading space makes " ab" mean "a word starting with ab"
+        padded = " " + text.replace(" ", "  ") + " "
+        grams = {padded[i:i + 3] for i in range(len(padded) - 2)}
+        ids = np.fromiter(
+            (_GRAM_IDS.setdefault(g, len(_GRAM_IDS)) for g in grams),
+            dtype=np.int32, count=len(grams)
+        )
+        _TEXT_GRAMS[text] = ids
+    return ids
+
+def build_search_index(df):
+    """{"texts": search text per row, "postings": gram id -> sorted row ids}."""
+    parts = [df[c].fillna("").astype(str) for c in SEARCH_COLUMNS if c in df.columns]
+    if not parts:
+        return {}
+    joined = parts[0].str.cat(parts[1:], sep=" ") if len(parts) > 1 else parts[0]
+    texts = _map_distinct(joined, _search_text, "").to_numpy(dtype=object)
+    grams = [_text_grams(t) for t in texts]
+    lengths = np.fromiter((len(g) for g in grams), dtype=np.int64, count=len(grams))
+    gram_col = np.concatenate(grams) if grams else np.array([], dtype=np.int32)
+    row_col = np.repeat(np.arange(len(texts)), lengths)
+    # one sort of (gram, row) packed into int64 groups rows by gram, ascending
+    n = max(len(texts), 1)
+    packed = np.sort(gram_col.astype(np.int64) * n + row_col)
+    gram_col, row_col = packed // n, packed % n
+    starts = np.flatnonzero(np.r_[True, gram_col[1:] != gram_col[:-1]]) if len(gram_col) else []
+    bounds = np.r_[starts, len(gram_col)]
+    postings = {
+        int(gram_col[s]): row_col[s:e] for s, e in zip(bounds[:-1], bounds[1:])
+    }
+    # forget texts that are no longer loaded
+    global _TEXT_GRAMS
+    _TEXT_GRAMS = {t: _TEXT_GRAMS[t] for t in set(texts)}
+    # fixed-width copy so the final substring check runs in numpy
+    return {"texts": texts.astype(str), "postings": postings}
+
+def _word_grams(word):
+    """
+    Gram ids every text containing *word* must have (word may be a prefix),
+    one list of alternatives per position, and whether they prove a match.
+    """
+    if len(word) == 1:
+        return [[i for g, i in _GRAM_IDS.items() if g.startswith(" " + word)]], True
+    if len(word) == 2:
+        return [[_GRAM_IDS.get(" " + word, -1)]], True
+    grams = [[_GRAM_IDS.get(word[i:i + 3], -1)] for i in range(len(word) - 2)]
+    return grams, len(grams) == 1
+
+def search_rows(query):
+    """
+    Sorted row ids whose name/description contains every word of *query*
+    (words under three letters match as word prefixes), or None when the
+    query is empty or the index isn't built.
+    """
+    words = _search_text(query).split()
+    index = _SEARCH_INDEX
+    if not words or not index:
+        return None
+    postings = index["postings"]
+    texts = index["texts"]
+    lists, unproven = [], []
+    for word in words:
+        positions, exact = _word_grams(word)
+        if not exact:
+            unproven.append(word)
+        for alternatives in positions:
+            hits = [postings[i] for i in alternatives if i in postings]
+            if not hits:
+                return np.array([], dtype=np.int64)
+            lists.append(hits)
+    # intersect on a row mask, starting from the narrowest gram
+    lists.sort(key=lambda hits: sum(map(len, hits)))
+    keep = np.zeros(len(texts), dtype=bool)
+    for hits in lists[0]:
+        keep[hits] = True
+    rows = np.flatnonzero(keep)
+    for hits in lists[1:]:
+        keep[:] = False
+        for h in hits:
+            keep[h] = True
+        rows = rows[keep[rows]]
+        if not len(rows):
+            return rows
+    # trigrams can match out of order; confirm longer words on what's left
+    for word in unproven:
+        if len(rows) * 4 > len(texts):
+            # cheaper to scan every text than to gather most of them
+            rows = rows[(np.char.find(texts, word) >= 0)[rows]]
+        else:
+            rows = rows[np.char.find(texts[rows], word) >= 0]
+    return rows
+
+
+# ------------------ Name Index ------------------
+# Product Name* -> row position (first row with that name), plus plain
+# object arrays of the few columns the tag panels and lineage editor read
+# per name, so those lookups are a dict hit and an array index instead of
+# a boolean mask over global_df.
+NAME_FIELDS = ("Product Type*", "Lineage", "Product Strain", "DisplayGroup")
+_NAME_INDEX = {}
+_NAME_FIELDS = {}
+
+def build_name_index(df):
+    if "Product Name*" not in df.columns:
+        return {}, {}
+    names = df["Product Name*"].to_numpy(dtype=object)
+    first = ~pd.Series(names).duplicated().to_numpy()
+    index = dict(zip(names[first].tolist(), np.flatnonzero(first).tolist()))
+    fields = {
+        col: df[col].to_numpy(dtype=object) for col in NAME_FIELDS if col in df.columns
+    }
+    return index, fields
+
+def name_field(name, column, default=None):
+    """*column* of the loaded product called *name* (first match), or *default*."""
+    pos = _NAME_INDEX.get(name)
+    values = _NAME_FIELDS.get(column)
+    if pos is None or values is None:
+        return default
+    return values[pos]
+
+
+# ------------------ Loaded Data ------------------
+DATA_GENERATION = 0    # bumped every time global_df is replaced
+_LOADED_SOURCE = None  # file global_df came from
+
+def set_global_df(df, source=None):
+    """
+    Replace global_df and refresh everything derived from it (_norm_ and
+    DisplayGroup columns, name/facet/range/search indexes, filter views,
+    product store).
+    Every load / reload goes through here.
+    """
+    global global_df, DATA_GENERATION, _LOADED_SOURCE, _FACETS, _RANGES, _SEARCH_INDEX
+    global _NAME_INDEX, _NAME_FIELDS
+    df = df.reset_index(drop=True)
+    normalize_columns(df)
+    df["DisplayGroup"] = display_group_column(df)
+    _NAME_INDEX, _NAME_FIELDS = build_name_index(df)
+    _FACETS = build_facet_index(df)
+    _RANGES = build_range_index(df)
+    _SEARCH_INDEX = build_search_index(df)
+    global_df = df
+    DATA_GENERATION += 1
+    _filter_view.cache_clear()
+    _LOADED_SOURCE = source
+    if PRODUCT_STORE_ENABLED and len(df):
+        cols = [c for c in PRODUCT_STORE_COLUMNS.values() if c in df.columns]
+        _IO_POOL.submit(store_products, df[cols].copy(), source or "(unsaved)", DATA_GENERATION) \
+            .add_done_callback(_log_background_failure)
+    return df
+
+def ensure_loaded(file_path):
+    """global_df for *file_path*, preprocessing it only if it isn't already loaded."""
+    if global_df is None or file_path != _LOADED_SOURCE:
+        set_global_df(preprocess_excel(file_path, return_df=True), file_path)
+    return global_df
+
+def filter_rows(filters):
+    """
+    Positions of the global_df rows matching *filters* (TAG_FILTER_COLUMNS
+    keys, "All" matches anything; "in_stock" drops Quantity <= 0;
+    RANGE_FILTER_COLUMNS keys take (lo, hi)), in frame order.
+    """
+    if global_df is None:
+        return np.array([], dtype=np.int64)
+    rows = _column_filter_rows(
+        {k: v for k, v in filters.items() if k in TAG_FILTER_COLUMNS and filter_values(v)}
+    )
+    mask = extra_row_mask(filters)
+    if mask is not None:
+        rows = rows[mask[rows]]
+    return rows
+
+def _column_filter_rows(active):
+    if not active:
+        return np.arange(len(global_df))
+    rows = facet_rows(active)
+    if rows is not None:
+        return rows
+    if _store_ready():
+        try:
+            return store_filter_rows(active, _LOADED_SOURCE or "(unsaved)")
+        except Exception as e:
+            logging.warning("Product store query failed, filtering in memory: %s", e)
+    return global_df.index.get_indexer(apply_filters(global_df, active).index)
+
+def filtered_frame(filters):
+    """The global_df rows matching *filters*."""
+    return global_df.iloc[filter_rows(filters)]
+
+
+# ------------------ Filter Dropdown Widget ------------------
+# Stands in for tk.OptionMenu on the filter panel.  Options are only stored
+# by set_dropdown_options; the type-to-filter list is built when the
+# dropdown is opened, in a Listbox (which only draws the rows in view).
+FILTER_DROPDOWN_ROWS = 15
+
+def make_filter_dropdown(parent, var, multi=False):
+    """
+    Button showing *var* that opens a searchable list of its options.
+    With *multi* picking an entry toggles it in an "A; B" selection.
+    """
+    button = tkmod.Button(parent, textvariable=var, anchor="w", bg="white", width=10)
+    button.var = var
+    button.multi = multi
+    button.options = ((), ())  # (values, labels)
+    button.popup = None
+    button.closed_at = 0.0
+    button.config(command=lambda: toggle_filter_dropdown(button))
+    return button
+
+def set_dropdown_options(button, values, labels):
+    """Store the dropdown's options; a no-op when they haven't changed."""
+    options = (tuple(values), tuple(labels))
+    if options == button.options:
+        return False
+    button.options = options
+    if button.popup is not None:
+        _fill_dropdown_list(button)
+    return True
+
+def toggle_filter_dropdown(button):
+    if button.popup is not None:
+        close_filter_dropdown(button)
+        return
+    if time.monotonic() - button.closed_at < 0.3:
+        return  # this click already closed it via focus-out
+    popup = tkmod.Toplevel(button)
+    popup.overrideredirect(True)
+    popup.geometry(f"+{button.winfo_rootx()}+{button.winfo_rooty() + button.winfo_height()}")
+    button.query = tkmod.StringVar(popup)
+    entry = tkmod.Entry(popup, textvariable=button.query, font=("Arial", 12))
+    entry.pack(fill="x")
+    body = tkmod.Frame(popup)
+    body.pack(fill="both", expand=True)
+    listbox = tkmod.Listbox(body, height=FILTER_DROPDOWN_ROWS, width=32, activestyle="none",
+                            exportselection=False, font=("Arial", 11))
+    scrollbar = tkmod.Scrollbar(body, orient="vertical", command=listbox.yview)
+    listbox.configure(yscrollcommand=scrollbar.set)
+    listbox.pack(side="left", fill="both", expand=True)
+    scrollbar.pack(side="right", fill="y")
+    button.popup, button.listbox = popup, listbox
+
+    button.query.trace_add("write", lambda *args: _fill_dropdown_list(button))
+    listbox.bind("<ButtonRelease-1>", lambda e: _pick_dropdown_entry(button, listbox.nearest(e.y)))
+    listbox.bind("<Return>", lambda e: _pick_dropdown_entry(button, listbox.index("active")))
+    entry.bind("<Return>", lambda e: _pick_dropdown_entry(button, 1 if listbox.size() > 1 else 0))
+    entry.bind("<Down>", lambda e: (listbox.focus_set(), listbox.activate(0)))
+    for widget in (entry, listbox):
+        widget.bind("<Escape>", lambda e: close_filter_dropdown(button))
+        widget.bind("<FocusOut>", lambda e: popup.after(50, lambda: _close_if_unfocused(button)))
+    _fill_dropdown_list(button)
+    entry.focus_set()
+
+def close_filter_dropdown(button):
+    if button.popup is not None:
+        button.popup.destroy()
+        button.popup = None
+        button.closed_at = time.monotonic()
+
+def _close_if_unfocused(button):
+    popup = button.popup
+    if popup is None:
+        return
+    try:
+        focus = popup.focus_get()
+    except (KeyError, tkmod.TclError):
+        focus = None
+    if focus is None or not str(focus).startswith(str(popup)):
+        close_filter_dropdown(button)
+
+def _fill_dropdown_list(button):
+    """(Re)fill the open list with 'All' plus the options matching the typed text."""
+    query = normalize(button.query.get())
+    values, labels = button.options
+    chosen = set(split_filter_value(button.var.get())) if button.multi else set()
+    shown = [("All", "All")] + [
+        (v, label) for v, label in zip(values, labels)
+        if not query or query in normalize(label)
+    ]
+    button.shown = [v for v, _ in shown]
+    if button.multi:
+        text = [label if v == "All" else ("✓ " if v in chosen else "    ") + label for v, label in shown]
+    else:
+        text = [label for _, label in shown]
+    listbox = button.listbox
+    top = listbox.yview()[0]
+    listbox.delete(0, "end")
+    listbox.insert("end", *text)
+    listbox.yview_moveto(top)
+
+def _pick_dropdown_entry(button, index):
+    if not 0 <= index < len(getattr(button, "shown", ())):
+        return
+    value = button.shown[index]
+    if value == "All":
+        button.var.set("All")
+        close_filter_dropdown(button)
+    elif button.multi:
+        # stay open so several values can be ticked in a row
+        toggle_filter_value(button.var, value)
+        _fill_dropdown_list(button)
+    else:
+        button.var.set(value)
+        close_filter_dropdown(button)
+
+
+# ------------------ Filter Views & Presets ------------------
+# Everything update_all_dropdowns derives from one filter combination, kept
+# in an LRU keyed on DATA_GENERATION so a reload can never serve stale rows.
+# Presets are named filter combinations saved next to the other caches.
+FILTER_VIEW_CACHE_SIZE = 32
+FILTER_PRESETS_PATH = os.path.join(app_cache_dir(), "filter_presets.json")
+
+def _filter_key(filters):
+    return tuple((key, tuple(filter_values(filters.get(key, "All")))) for key in TAG_FILTER_COLUMNS) \
+        + tuple((key, filters.get(key) or None) for key in ("in_stock", *RANGE_FILTER_COLUMNS))
+
+@lru_cache(maxsize=FILTER_VIEW_CACHE_SIZE)
+def _filter_view(generation, key):
+    filters = dict(key)
+    rows = filter_rows(filters)
+    rows.setflags(write=False)
+    options = {k: facet_options(k, filters) for k in TAG_FILTER_COLUMNS}
+    names = tuple(sorted(global_df["Product Name*"].iloc[rows].dropna().unique()))
+    return rows, options, names
+
+def filter_view(filters):
+    """
+    (rows, {key: facet_options}, sorted product names) for *filters*,
+    memoized per loaded frame.  Treat the results as read-only.
+    """
+    return _filter_view(DATA_GENERATION, _filter_key(filters))
+
+def load_filter_presets():
+    """{preset name: filters dict} from disk; {} if none saved or unreadable."""
+    try:
+        with open(FILTER_PRESETS_PATH, encoding="utf-8") as f:
+            presets = json.load(f)
+    except FileNotFoundError:
+        return {}
+    except (OSError, ValueError) as e:
+        logging.warning("Ignoring unreadable filter presets %s: %s", FILTER_PRESETS_PATH, e)
+        return {}
+    return {name: dict(filters) for name, filters in presets.items() if isinstance(filters, dict)}
+
+def _write_filter_presets(presets):
+    os.makedirs(os.path.dirname(FILTER_PRESETS_PATH), exist_ok=True)
+    tmp = f"{FILTER_PRESETS_PATH}.{os.getpid()}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(presets, f, indent=2, sort_keys=True)
+    os.replace(tmp, FILTER_PRESETS_PATH)
+
+def save_filter_preset(name, filters):
+    presets = load_filter_presets()
+    presets[name] = {key: filters.get(key, "All") for key in TAG_FILTER_COLUMNS}
+    _write_filter_presets(presets)
+    return presets
+
+def delete_filter_preset(name):
+    presets = load_filter_presets()
+    if presets.pop(name, None) is not None:
+        _write_filter_presets(presets)
+    return presets
+
+def warm_filter_presets(base=None):
+    """
+    Fill the view cache for every saved preset so applying one is instant.
+    Presets only hold the dropdowns, so each is warmed on top of the stock /
+    range state of *base* (the GUI's current filters by default), which is
+    the state it will be applied in.
+    """
+    if global_df is None:
+        return
+    base = current_filters() if base is None else base
+    for filters in list(load_filter_presets().values())[:FILTER_VIEW_CACHE_SIZE // 2]:
+        filter_view(dict(base, **filters))
+
+
+# ─── Main generation function ─────────────────────────────────────
+def run_full_process_by_group(template_type, group_by_fields=["Lineage", "Product Strain"]):
+    import os, datetime
+    splash = show_splash2(root)
+
+    # 1) Get & validate file
+    file_path = file_entry.get()
+    if not file_path:
+        messagebox.showerror("Error", "Please select a data file.")
+        return
+
+    # 2) Load (once per file) & read the filters
+    filters = current_filters()
+
+    ensure_loaded(file_path)
+
+    # 3) Apply dropdown filters
+    df = filtered_frame(filters).copy()
+
+    # 4) Limit to checked Selected Tags
+    sel = checked_tags(selected_tags)
+    if not sel:
+        messagebox.showerror("Error", "No selected tags are checked!")
+        return
+    df = df[df["Product Name*"].isin(sel)]
+
+    # 5) Render front & back sheets
+    master_doc = render_group_tags(df, template_type, SCALE_FACTOR, print_vendor_back_var.get())
+    if master_doc is None:
+        messagebox.showerror("Error", "No documents generated.")
+        return
+    orientation = "horizontal" if template_type == "horizontal" else "vertical"
+
+    # 6) Save & open
     today = datetime.datetime.now().strftime("%Y%m%d")
-    suffix = "_".join(
-        p for p in [filters["product_type"], filters["lineage"],
-                    filters["brand"], filters["vendor"],
-                    filters["weight"], filters["strain"]]
-        if p and p!="All"
-    ) or "all"
+    suffix = filter_filename_suffix(filters)
     out = os.path.join(os.path.expanduser("~"), "Downloads",
                        f"{today}_{orientation}_{suffix}_tags.docx")
-    master_doc.save(out)
+    try:
+        master_doc.save(out)
+    except OSError as e:
+        splash.destroy()
+        messagebox.showerror("Error", f"Could not save {out}:\n{e}")
+        return
     open_file(out)
     splash.destroy()
     messagebox.showinfo("Success", f"Saved: {out}")
@@ -1893,10 +3389,6 @@ def run_full_process_by_group(template_type, group_by_fields=["Lineage", "Produc
 
 def run_full_process_mini(bypass_tag_filter: bool = False):
     splash = show_splash2(root)
-    # ── 0.  Mini template + constants ───────────────────────────────
-    base_template       = resource_path("templates/mini.docx")
-    orientation         = "mini"
-    current_font_scheme = FONT_SCHEME_MINI
 
     # ── 1.  Pick up the user’s file and filters ─────────────────────
     file_path_val = file_entry.get()
@@ -1904,34 +3396,16 @@ def run_full_process_mini(bypass_tag_filter: bool = False):
         messagebox.showerror("Error", "Please select a data file.")
         return
 
-    filters = {
-        "product_type": product_type_filter_var.get(),
-        "lineage":      lineage_filter_var.get(),
-        "brand":        product_brand_filter_var.get(),
-        "vendor":       vendor_filter_var.get(),
-        "weight":       weight_filter_var.get(),
-        "strain":       product_strain_filter_var.get()
-    }
+    filters = current_filters()
 
-    # preprocess once – returns XLSX path + DataFrame cached in RAM
-    new_excel_file = preprocess_excel(file_path_val, filters)
-    global global_df
-    global_df = pd.read_excel(new_excel_file, engine="openpyxl")
-    df = global_df.copy()
+    # preprocess once – the cleaned DataFrame stays in RAM
+    ensure_loaded(file_path_val)
 
     # ── 2.  Apply dropdown filters & selected‑tag filter ────────────
-    df = filter_column(df, "Product Type*", product_type_filter_var)
-    df = filter_column(df, "Lineage",         lineage_filter_var)
-    df = filter_column(df, "Product Brand",   product_brand_filter_var)
-    df = filter_column(df, "Vendor",          vendor_filter_var)
-    df = filter_column(df, "CombinedWeight",  weight_filter_var)
-    df = filter_column(df, "Product Strain",  product_strain_filter_var)
-
-    if "Price" in df.columns:
-        df["Price"] = df["Price"].apply(lambda x: x.lstrip("'") if isinstance(x, str) else x)
+    df = filtered_frame(filters).copy()
 
     if not bypass_tag_filter:
-        selected_names = [n for n, v in selected_tags_vars.items() if v.get()]
+        selected_names = checked_tags(selected_tags)
         if not selected_names:
             messagebox.showerror("Error", "No selected tags are checked!")
             return
@@ -1941,66 +3415,24 @@ def run_full_process_mini(bypass_tag_filter: bool = False):
         messagebox.showerror("Error", "No records found after filtering.")
         return
 
-    # ── 3.  Build work items for the pool ───────────────────────────
-    records   = df.to_dict(orient="records")
-    base_buf = expand_template_to_4x5_fixed_scaled(
-        base_template,
-        scale_factor=SCALE_FACTOR
-    )
-
-
-    def chunk_records_mini(rec, size=30):      # bigger chunks = faster
-        for i in range(0, len(rec), size):
-            yield rec[i:i+size]
-
-    work_items = [
-        (chunk, base_buf, current_font_scheme, orientation, SCALE_FACTOR)
-        for chunk in chunk_records_mini(records)
-    ]
-
-    # ── 4.  Render in parallel ──────────────────────────────────────
-    from concurrent.futures import ProcessPoolExecutor
-    with ProcessPoolExecutor(max_workers=os.cpu_count()) as exe:
-        docs_bytes = list(exe.map(process_chunk, work_items))
-
-    docs = [Document(BytesIO(b)) for b in docs_bytes if b]
-    if not docs:
+    # ── 3.  Render in parallel & stitch ─────────────────────────────
+    master_doc = render_mini_tags(df, SCALE_FACTOR)
+    if master_doc is None:
         messagebox.showerror("Error", "No documents were generated.")
         return
 
-    # ── 5.  Stitch docs and save ────────────────────────────────────
-        # after you collect docs = [Document(BytesIO(b)) for b in docs_bytes if b]
-    blank_doc = Document()  # completely empty document for a blank “back-side” page
-
-    master_doc = docs[0]
-    composer   = Composer(master_doc)
-    # start at 1 so we don’t prepend a blank in front of the very first
-    for sub_doc in docs[1:]:
-        composer.append(sub_doc)
-        composer.append(blank_doc)   # <-- insert a blank page after each mini page
-
-    # now continue with reapply_table_cell_spacing_only, save, open, etc.
-
-    
-    reapply_table_cell_spacing_only(master_doc)
-        # after you generate the front‐side pages in master_doc…
-    #if print_vendor_back_var.get():
-        # your existing code that inserts the matching
-        # vendor‐name back‐pages in the same grid
-        #add_vendor_back_pages(master_doc, records)
-
+    # ── 4.  Save ────────────────────────────────────────────────────
     today = datetime.datetime.today().strftime("%Y-%m-%d")
-    safe = lambda v: str(v).replace(" ", "").replace("/", "").replace("-", "").replace("*", "") if v and v != "All" else None
-    suffix_parts = [safe(product_type_filter_var.get()),
-                    safe(lineage_filter_var.get()),
-                    safe(product_brand_filter_var.get()),
-                    safe(vendor_filter_var.get()),
-                    safe(weight_filter_var.get()),
-                    safe(product_strain_filter_var.get())]
-    suffix = "_".join(p for p in suffix_parts if p) or "all"
+    safe = lambda v: sanitize_filename(v).replace("_", "").replace("-", "")
+    suffix = filter_filename_suffix(filters, safe)
 
     doc_path = os.path.join(os.path.expanduser("~"), "Downloads", f"{today}_mini_{suffix}_tags.docx")
-    master_doc.save(doc_path)
+    try:
+        master_doc.save(doc_path)
+    except OSError as e:
+        splash.destroy()
+        messagebox.showerror("Error", f"Could not save {doc_path}:\n{e}")
+        return
     splash.destroy()
     open_file(doc_path)
     messagebox.showinfo("Success", f"Word file saved as:\n{doc_path}")
@@ -2057,13 +3489,11 @@ def on_mousewheel(event, canvas):
     return "break"
 
 def update_available_tags_all_state_available():
-    # Loop through each available tag's BooleanVar and set it to the checkbox state.
-    for tag, var in available_tags_vars.items():
-        var.set(available_tags_all_var.get())
+    # Set every available tag to the checkbox state in one array write.
+    set_tags_checked(available_tags, panel_tag_ids(available_tags), available_tags_all_var.get())
 
 def select_all_available():
-    for var in available_tags_vars.values():
-        var.set(True)
+    set_tags_checked(available_tags, panel_tag_ids(available_tags), True)
         
 def build_dropdown_cache(df):
     global dropdown_cache
@@ -2074,12 +3504,7 @@ def build_dropdown_cache(df):
             dropdown_cache[col] = unique_vals
 
 def update_option_menu(option_widget, var, colname):
-    menu = option_widget["menu"]
-    menu.delete(0, "end")
-    options = dropdown_cache.get(colname, []).copy()
-    options.insert(0, "All")
-    for val in options:
-        menu.add_command(label=val, command=lambda v=val: var.set(v))
+    _update_option_menu(option_widget, var, colname, dropdown_cache.get(colname, []))
 
 def populate_filter_dropdowns():
     global global_df
@@ -2098,6 +3523,8 @@ def populate_filter_dropdowns():
         update_option_menu(weight_option, weight_filter_var, "CombinedWeight")
     if "Product Strain" in global_df.columns:
         update_option_menu(product_strain_option, product_strain_filter_var, "Product Strain")
+    reset_range_sliders()
+    warm_filter_presets()
 
 def update_all_dropdowns():
     global _UPDATING_FILTERS, global_df, json_matched_names
@@ -2105,40 +3532,29 @@ def update_all_dropdowns():
         return
     _UPDATING_FILTERS = True
     try:
-        # 1) Start from the full sheet
-        df = global_df.copy()
-
-        # 2) Apply each dropdown filter to df
-        def apply(col, var):
-            v = normalize(var.get())
-            if v and v != "all" and col in df:
-                return df[df[col].astype(str).apply(normalize) == v]
-            return df
-
-        df = apply("Product Type*",    product_type_filter_var)
-        df = apply("Lineage",           lineage_filter_var)
-        df = apply("Product Brand",     product_brand_filter_var)
-        df = apply("Vendor",            vendor_filter_var)
-        df = apply("Product Strain",    product_strain_filter_var)
-        df = apply("CombinedWeight",    weight_filter_var)
-
-        # 3) Rebuild every dropdown’s menu from your cached universe
-        _update_option_menu(product_type_option,   product_type_filter_var,   "Product Type*",  dropdown_cache["Product Type*"])
-        _update_option_menu(lineage_option,        lineage_filter_var,         "Lineage",         dropdown_cache["Lineage"])
-        _update_option_menu(product_brand_option,  product_brand_filter_var,   "Product Brand",   dropdown_cache["Product Brand"])
-        _update_option_menu(vendor_option,         vendor_filter_var,          "Vendor",          dropdown_cache["Vendor"])
-        _update_option_menu(product_strain_option, product_strain_filter_var,  "Product Strain",  dropdown_cache["Product Strain"])
-        _update_option_menu(weight_option,         weight_filter_var,          "CombinedWeight",  sorted(
-            df["CombinedWeight"].dropna().unique(),
-            key=lambda x: extract_float(str(x))
-        ))
+        # 1) Rows, reachable options and names for this filter
+        #    combination (memoized; see filter_view)
+        rows, options, names = filter_view(current_filters())
+
+        # 3) Rebuild every dropdown’s menu: the values still reachable
+        #    given the *other* dropdowns, with their product counts
+        for key, (option, var) in filter_widgets().items():
+            column = TAG_FILTER_COLUMNS[key]
+            if options[key] is None:
+                _update_option_menu(option, var, column, dropdown_cache.get(column, []))
+            else:
+                _update_option_menu(option, var, column, *options[key])
 
         # 4) Decide which list of names to show
         if json_matched_names:
             names = json_matched_names
         else:
-            # now *use* the already-filtered df
-            names = sorted(df["Product Name*"].dropna().unique())
+            # the filtered names, narrowed by the search box
+            hits = search_rows(product_search_var.get()) if product_search_var else None
+            if hits is not None:
+                rows = rows[np.isin(rows, hits, assume_unique=True)]
+                names = sorted(global_df["Product Name*"].iloc[rows].dropna().unique())
+            names = list(names)
 
         # 5) Exactly one redraw of the Available Tags panel
         populate_available_tags(names)
@@ -2148,340 +3564,419 @@ def update_all_dropdowns():
 
 
 
-def _update_option_menu(menu_widget, var, colname, value_list):
+def schedule_dropdown_update():
     """
-    Clears and repopulates the OptionMenu.
-    Always ensures 'All' is first and preserves the current selection if still valid.
+    Queue one update_all_dropdowns for when Tk goes idle.  Filter traces and
+    clear_filters call this, so a burst of writes costs a single rebuild.
     """
-    menu = menu_widget["menu"]
-    menu.delete(0, "end")
-
-    all_vals = ["All"] + list(value_list)
-    current = var.get()
-    if current not in all_vals:
-        current = "All"
-    var.set(current)
-
-    for v in all_vals:
-        menu.add_command(label=v, command=lambda _v=v: var.set(_v))
+    global _DROPDOWN_UPDATE_PENDING
+    if _DROPDOWN_UPDATE_PENDING:
+        return
+    _DROPDOWN_UPDATE_PENDING = True
+    root.after_idle(_run_dropdown_update)
 
+def _run_dropdown_update():
+    global _DROPDOWN_UPDATE_PENDING
+    _DROPDOWN_UPDATE_PENDING = False
+    update_all_dropdowns()
 
-def populate_available_tags(names):
+def _update_option_menu(dropdown, var, colname, value_list, counts=None):
     """
-    Populate the left-hand ‘Available Tag List’ with colored checkbuttons,
-    matching the same LINEAGE_COLOR_MAP logic as for selected tags.
+    Hands a filter dropdown its options ('All' is always offered first) and
+    preserves the current selection if still valid.  With *counts* each
+    entry is labelled "value (n)".  Columns in MULTI_SELECT_COLUMNS keep
+    whichever of their "A; B" values are still offered.
     """
-    global available_tags_container, available_tags_vars, placeholder_img, global_df, available_canvas
-
-    # clear out old widgets
-    for widget in available_tags_container.winfo_children():
-        widget.destroy()
-    available_tags_vars.clear()
-
-
-    CLASSIC_TYPES = {
-    "flower", "pre-roll", "concentrate",
-    "infused pre-roll", "solventless concentrate",
-    "vape cartridge"
+    values = [str(v) for v in value_list]
+    labels = values if counts is None else [f"{v} ({n})" for v, n in zip(values, counts)]
+    current = var.get()
+    # only a real change writes the var: every write fires its trace
+    if colname in MULTI_SELECT_COLUMNS:
+        offered = set(values)
+        chosen = split_filter_value(current)
+        keep = [v for v in chosen if v in offered]
+        if keep != chosen:
+            var.set(MULTI_VALUE_SEP.join(keep) or "All")
+    elif current != "All" and current not in values:
+        var.set("All")
+    set_dropdown_options(dropdown, values, labels)
+
+def toggle_filter_value(var, value):
+    """Add *value* to a multi-select filter, or drop it if already picked."""
+    chosen = split_filter_value(var.get())
+    chosen = [v for v in chosen if v != value] if value in chosen else chosen + [value]
+    var.set(MULTI_VALUE_SEP.join(chosen) or "All")
+
+def slider_range(key):
+    """
+    (lo, hi) picked on *key*'s range sliders, with a bound left at the data's
+    end as None; None when both are (so unpriced/unweighed rows stay).
+    """
+    bounds = range_bounds(key)
+    if key not in range_sliders or bounds is None:
+        return None
+    lo_var, hi_var = range_sliders[key][:2]
+    lo = lo_var.get() if lo_var.get() > bounds[0] else None
+    hi = hi_var.get() if hi_var.get() < bounds[1] else None
+    return None if lo is None and hi is None else (lo, hi)
+
+def reset_range_sliders():
+    """Stretch every range slider over the loaded data and select all of it."""
+    for key, (lo_var, hi_var, lo_scale, hi_scale) in range_sliders.items():
+        lo, hi = range_bounds(key) or (0.0, 0.0)
+        lo, hi = math.floor(lo), math.ceil(hi)
+        for scale in (lo_scale, hi_scale):
+            scale.config(from_=lo, to=hi)
+        lo_var.set(lo)
+        hi_var.set(hi)
+
+def filter_widgets():
+    """TAG_FILTER_COLUMNS key -> (OptionMenu, StringVar) of the left-hand dropdowns."""
+    return {
+        "product_type": (product_type_option,   product_type_filter_var),
+        "lineage":      (lineage_option,        lineage_filter_var),
+        "brand":        (product_brand_option,  product_brand_filter_var),
+        "vendor":       (vendor_option,         vendor_filter_var),
+        "strain":       (product_strain_option, product_strain_filter_var),
+        "weight":       (weight_option,         weight_filter_var),
     }
 
-    for name in names:
-        # get the row
-        row = global_df[global_df["Product Name*"] == name].iloc[0]
-        ptype = str(row["Product Type*"]).strip().lower()
 
-        # 1) if it’s a classic type, color by Lineage
-        if ptype in CLASSIC_TYPES:
-            lin = str(row["Lineage"]).upper()
-        else:
-            # non-classic: color by strain overrides
-            if ptype == "paraphernalia":
-                lin = "PARAPHERNALIA"
-            elif str(row["Product Strain"]) == "CBD Blend":
-                lin = "CBD"
-            elif str(row["Product Strain"]) == "Mixed":
-                lin = "MIXED"
-            else:
-                # fallback to Lineage if strain isn’t one of above
-                lin = str(row["Lineage"]).upper()
-
-        # now pick your colors
-        bg = LINEAGE_COLOR_MAP.get(lin, "#FFFFFF")
-        fg = "white" if bg != "#FFFFFF" else "black"
-
-        # build the row frame + transparent Checkbutton as before
-        frame = tkmod.Frame(available_tags_container, bg=bg)
-        frame.pack(fill="x", pady=1)
-
-        var = tkmod.BooleanVar(value=True)
-        chk = tkmod.Checkbutton(
-            frame, text=name, variable=var,
-            bg=bg, fg=fg, selectcolor=bg,
-            activebackground=bg, activeforeground=fg,
-            anchor="w", bd=0, highlightthickness=0
-        )
-        chk.pack(fill="x", padx=5, pady=2)
-        available_tags_vars[name] = var
-    available_canvas.update_idletasks()
-    available_canvas.configure(scrollregion=available_canvas.bbox("all"))
-    available_canvas.yview_moveto(0)
-
-SELECTED_GROUP_ORDER = [
-    "SATIVA",
-    "HYBRID/SATIVA",
-    "INDICA",
-    "HYBRID/INDICA",
-    "HYBRID",        # catch-all hybrid
-    "CBD",
-    "MIXED",
-    "PARAPHERNALIA"
-]
+# ------------------ Tag Selection State ------------------
+# Every product name shown in either panel gets a small integer tag id, and
+# each panel keeps its checked states in its own bool array indexed by tag
+# id (a product can be listed in both panels and be ticked in only one).
+# The panel dicts (available_tags / selected_tags) map name -> tag id, so
+# select all, invert and select-by-filter are array writes with no Tcl
+# variable per product.  Ids are per name, not per row, so they survive
+# reloads.
+_TAG_IDS = {}
+_TAG_CHECKED = {
+    "available": np.zeros(1024, dtype=bool),
+    "selected":  np.zeros(1024, dtype=bool),
+}
 
-def _selected_lin_group(name):
+def tag_id(name):
+    """The tag id of *name*, allocating one (unchecked) the first time it's seen."""
+    tid = _TAG_IDS.get(name)
+    if tid is None:
+        tid = _TAG_IDS[name] = len(_TAG_IDS)
+        for panel, checked in _TAG_CHECKED.items():
+            if tid >= len(checked):
+                _TAG_CHECKED[panel] = np.concatenate([checked, np.zeros(len(checked), dtype=bool)])
+    return tid
+
+def tag_checks(panel):
+    """The checked-state array (indexed by tag id) of *panel*."""
+    return _TAG_CHECKED["selected" if panel is selected_tags else "available"]
+
+def panel_tag_ids(panel):
+    """Tag ids of every name in *panel*, in panel order."""
+    return np.fromiter(panel.values(), dtype=np.intp, count=len(panel))
+
+def checked_tags(panel):
+    """Names in *panel* whose tag is checked, in panel order."""
+    checked = tag_checks(panel)[panel_tag_ids(panel)].tolist()
+    return [name for name, on in zip(panel, checked) if on]
+
+def set_tags_checked(panel, ids, value):
+    """Check (or uncheck) the tags *ids* of *panel* in one write; *value* may be a mask."""
+    tag_checks(panel)[ids] = value
+    redraw_tag_panels()
+
+def invert_tags(panel):
+    ids = panel_tag_ids(panel)
+    set_tags_checked(panel, ids, ~tag_checks(panel)[ids])
+
+def check_tags_matching_filters(panel):
+    """Check exactly the tags in *panel* whose product passes the current filters."""
+    if global_df is None:
+        return
+    _, _, names = filter_view(current_filters())
+    keep = set(names)
+    set_tags_checked(panel, panel_tag_ids(panel),
+                     np.fromiter((n in keep for n in panel), dtype=bool, count=len(panel)))
+
+def _add_tags(panel, names, checked=True):
+    """Put *names* in *panel* with the given checked state."""
+    ids = [tag_id(name) for name in names]
+    panel.update(zip(names, ids))
+    tag_checks(panel)[ids] = checked
+
+
+# ------------------ Virtual Tag Panels ------------------
+# The Available/Selected canvases keep a pool of Checkbuttons just big
+# enough for the viewport.  Scrolling moves the pool and rebinds each
+# button to another product, so a redraw costs the window height, not the
+# catalogue size.  A panel's rows are (name, bg, fg) tuples kept in order
+# of a parallel list of sort keys (canvas.keys), so moving tags bisects
+# their rows in and out instead of rebuilding the list; the checked state
+# lives in the panel's tag_checks() array and only the pooled buttons
+# mirror it.
+TAG_ROW_HEIGHT = 26
+
+def init_tag_panel(canvas, scrollbar, panel):
+    """Turn *canvas* into a virtual tag list showing the tags dict *panel*."""
+    canvas.panel = panel
+    canvas.rows = []
+    canvas.keys = []
+    canvas.key_of = {}
+    canvas.pool = []
+    canvas.first = None
+    canvas.configure(yscrollincrement=TAG_ROW_HEIGHT)
+
+    def on_scroll(lo, hi):
+        scrollbar.set(lo, hi)
+        render_tag_panel(canvas)
+
+    canvas.configure(yscrollcommand=on_scroll)
+    canvas.bind("<Configure>", lambda e: render_tag_panel(canvas, force=True))
+
+def set_tag_panel_rows(canvas, rows, keys):
+    """Replace every row of *canvas*; *keys* are the rows' ascending sort keys."""
+    if canvas is None:
+        return
+    canvas.rows = rows
+    canvas.keys = keys
+    canvas.key_of = {row[0]: key for row, key in zip(rows, keys)}
+    canvas.yview_moveto(0)
+    _refresh_tag_panel(canvas)
+
+def insert_tag_rows(canvas, items):
+    """Insert (key, row) pairs at their sorted positions, leaving the rest alone."""
+    if canvas is None:
+        return
+    for key, row in items:
+        i = bisect.bisect_left(canvas.keys, key)
+        canvas.keys.insert(i, key)
+        canvas.rows.insert(i, row)
+        canvas.key_of[row[0]] = key
+    _refresh_tag_panel(canvas)
+
+def remove_tag_rows(canvas, names):
     """
-    Determine the lineage group for sorting/coloring,
-    matching the logic in populate_selected_tags.
+    Drop the rows of *names* (missing ones are ignored).  Rows are found by
+    the key they were inserted with, which stays valid even if a reload has
+    since changed the product's DisplayGroup.
     """
-    row = global_df[global_df["Product Name*"] == name].iloc[0]
-    ptype = str(row["Product Type*"]).strip().lower()
+    if canvas is None:
+        return
+    for name in names:
+        key = canvas.key_of.pop(name, None)
+        if key is None:
+            continue
+        i = bisect.bisect_left(canvas.keys, key)
+        if i < len(canvas.keys) and canvas.keys[i] == key:
+            del canvas.keys[i]
+            del canvas.rows[i]
+    _refresh_tag_panel(canvas)
+
+def _refresh_tag_panel(canvas):
+    canvas.configure(scrollregion=(0, 0, 0, len(canvas.rows) * TAG_ROW_HEIGHT))
+    render_tag_panel(canvas, force=True)
+
+def render_tag_panel(canvas, force=False):
+    """Bind the pooled Checkbuttons to the rows currently in view."""
+    if canvas is None or not hasattr(canvas, "rows"):
+        return
+    needed = canvas.winfo_height() // TAG_ROW_HEIGHT + 2
+    while len(canvas.pool) < needed:
+        chk = tkmod.Checkbutton(canvas, anchor="w", bd=0, highlightthickness=0, padx=5)
+        chk.var = tkmod.BooleanVar(canvas)
+        chk.panel = canvas.panel
+        chk.config(variable=chk.var, command=lambda chk=chk: _store_tag_check(chk))
+        for seq in ("<Enter>", "<MouseWheel>", "<Button-4>", "<Button-5>"):
+            # scrolling over a row should scroll the list it sits in
+            chk.bind(seq, lambda e: set_current_canvas(e, canvas), add="+")
+        item = canvas.create_window(0, 0, window=chk, anchor="nw", state="hidden")
+        canvas.pool.append((item, chk))
+        force = True
+    first = max(int(canvas.canvasy(0)) // TAG_ROW_HEIGHT, 0)
+    if not force and first == canvas.first:
+        return
+    canvas.first = first
+    checks = tag_checks(canvas.panel)
+    width = canvas.winfo_width()
+    for offset, (item, chk) in enumerate(canvas.pool):
+        index = first + offset
+        if index >= len(canvas.rows):
+            canvas.itemconfigure(item, state="hidden")
+            continue
+        name, bg, fg = canvas.rows[index]
+        chk.config(text=name, bg=bg, fg=fg, selectcolor=bg,
+                   activebackground=bg, activeforeground=fg)
+        chk.tag_name = name
+        chk.tag_id = tag_id(name)
+        chk.var.set(bool(checks[chk.tag_id]))
+        canvas.coords(item, 0, index * TAG_ROW_HEIGHT)
+        canvas.itemconfigure(item, state="normal", width=width, height=TAG_ROW_HEIGHT - 2)
 
-    # classic types color by lineage
-    CLASSIC_TYPES = {
-        "flower", "pre-roll", "concentrate",
-        "infused pre-roll", "solventless concentrate",
-        "vape cartridge"
-    }
+def _store_tag_check(chk):
+    tag_checks(chk.panel)[chk.tag_id] = chk.var.get()
 
-    if ptype in CLASSIC_TYPES:
-        lin = str(row["Lineage"]).upper()
-    else:
-        # paraphernalia always pink
-        if ptype == "paraphernalia":
-            lin = "PARAPHERNALIA"
-        # CBD Blend → yellow
-        elif str(row["Product Strain"]) == "CBD Blend":
-            lin = "CBD"
-        # everything else forced Mixed
-        elif str(row["Product Strain"]) == "Mixed":
-            lin = "MIXED"
-        else:
-            lin = str(row["Lineage"]).upper()
-    # safe‐guard
-    return SELECTED_GROUP_ORDER.index(lin) if lin in SELECTED_GROUP_ORDER else len(SELECTED_GROUP_ORDER)
+def redraw_tag_panels():
+    """Re-sync the visible buttons of both panels after a bulk state change."""
+    render_tag_panel(available_canvas, force=True)
+    render_tag_panel(selected_canvas, force=True)
 
+def tag_lineage(name):
+    """The precomputed DisplayGroup of product *name* ("" if it isn't loaded)."""
+    return name_field(name, "DisplayGroup", "")
 
-def populate_selected_tags(names):
-    splash = show_splash2(root)
-    global selected_tags_container, selected_tags_vars, placeholder_img, global_df, selected_canvas
+def _tag_row(name, lin):
+    bg = LINEAGE_COLOR_MAP.get(lin, "#FFFFFF")
+    fg = "white" if bg != "#FFFFFF" else "black"
+    return (name, bg, fg)
 
-# clear out old widgets
-    for widget in selected_tags_container.winfo_children():
-        widget.destroy()
-    selected_tags_vars.clear()
+# Available rows keep the order populate_available_tags got them in; a tag
+# that comes back from Selected returns to its old slot.
+_AVAILABLE_RANK = {}
 
-    # define the exact same lineage order you use in LINEAGE_COLOR_MAP
-    lineage_buckets = [
-        "SATIVA", "INDICA", "HYBRID", "HYBRID/SATIVA",
-        "HYBRID/INDICA", "CBD", "MIXED", "PARAPHERNALIA"
-    ]
+def _available_key(name):
+    return _AVAILABLE_RANK.setdefault(name, len(_AVAILABLE_RANK))
 
-    # build a dict: lineage → [product names]
-    buckets = {lin: [] for lin in lineage_buckets}
-    buckets["OTHER"] = []
+def _selected_key(name):
+    """Selected rows: by DisplayGroup in LINEAGE_ORDER (others last), then name."""
+    return (LINEAGE_RANK.get(tag_lineage(name), len(LINEAGE_ORDER)), name)
 
-    for name in names:
-        row = global_df[global_df["Product Name*"] == name].iloc[0]
-        ptype = str(row["Product Type*"]).lower().strip()
-        # determine “lin” exactly the same way you do for colors:
-        if ptype in {"flower","pre-roll","concentrate","infused pre-roll","solventless concentrate","vape cartridge"}:
-            lin = row["Lineage"].upper()
-        elif ptype == "paraphernalia":
-            lin = "PARAPHERNALIA"
-        elif str(row["Product Strain"]) == "CBD Blend":
-            lin = "CBD"
-        elif str(row["Product Strain"]) == "Mixed":
-            lin = "MIXED"
-        else:
-            lin = row["Lineage"].upper()
-
-        buckets.setdefault(lin if lin in buckets else "OTHER", []).append(name)
-
-    # now render, bucket-by-bucket in that fixed order
-    for lin in lineage_buckets + ["OTHER"]:
-        for name in sorted(buckets[lin]):
-            bg = LINEAGE_COLOR_MAP.get(lin, "#FFFFFF")
-            fg = "white" if bg != "#FFFFFF" else "black"
-
-            var = tkmod.BooleanVar(value=True)
-            chk = tkmod.Checkbutton(
-                selected_tags_container,
-                text=name,
-                variable=var,
-                bg=bg, fg=fg,
-                selectcolor=bg,
-                activebackground=bg,
-                activeforeground=fg,
-                anchor="w", bd=0, highlightthickness=0
-            )
-            chk.tag_name = name
-            chk.pack(fill="x", padx=5, pady=2)
-            selected_tags_vars[name] = var
-            splash.destroy()
+def render_available_tags():
+    """Redraw the Available panel from available_tags."""
+    names = sorted(available_tags, key=_available_key)
+    set_tag_panel_rows(available_canvas, [_tag_row(n, tag_lineage(n)) for n in names],
+                       [_available_key(n) for n in names])
+
+def populate_available_tags(names):
+    """
+    Populate the left-hand ‘Available Tag List’ with colored checkbuttons,
+    matching the same LINEAGE_COLOR_MAP logic as for selected tags.
+    """
+    available_tags.clear()
+    _AVAILABLE_RANK.clear()
+    _add_tags(available_tags, names)
+    render_available_tags()
 
-    selected_canvas.update_idletasks()
-    selected_canvas.configure(scrollregion=selected_canvas.bbox("all"))
-    selected_canvas.yview_moveto(0)
+def render_selected_tags():
+    """Redraw the Selected panel from selected_tags, grouped by lineage."""
+    keys = sorted(_selected_key(name) for name in selected_tags)
+    set_tag_panel_rows(selected_canvas, [_tag_row(name, tag_lineage(name)) for _, name in keys], keys)
+
+def populate_selected_tags(names):
+    selected_tags.clear()
+    _add_tags(selected_tags, names)
+    set_selected_divider(None)
+    render_selected_tags()
+
+def set_selected_divider(text):
+    """Show *text* above the Selected list (the filters it came from), or hide it."""
+    if selected_divider is None:
+        return
+    if text:
+        selected_divider.config(text=text)
+        selected_divider.pack(fill="x", padx=5, pady=2, before=selected_canvas)
+    else:
+        selected_divider.pack_forget()
 
 # --- New Section: Selected/Available Tags with "Select All" in Selected Tags ---
 selected_tags_all_var = None  # Initialize later in main()
+selected_divider = None       # Label above the Selected list, created in main()
 
 def update_selected_tags_all_state():
-    global selected_tags_vars, selected_tags_all_var
-    for tag, var in selected_tags_vars.items():
-        var.set(selected_tags_all_var.get())
-
-def create_selected_header():
-    global selected_tags_all_var
-    header_frame = tkmod.Frame(selected_tags_container, bg="lightgray")
-    header_frame.pack(fill="x", padx=2, pady=2)
-    select_all_chk = tkmod.Checkbutton(header_frame,
-                                         text="Select All (Selected Tags)",
-                                         variable=selected_tags_all_var,
-                                         bg="lightgray",
-                                         font=("Arial", 12),
-                                         anchor="w",
-                                         command=update_selected_tags_all_state)
-    select_all_chk.pack(side="left", padx=5)
+    set_tags_checked(selected_tags, panel_tag_ids(selected_tags), selected_tags_all_var.get())
+
+def _move_tags(tags, to_selected):
+    """
+    Move *tags* from one panel to the other, bisecting just their rows out
+    of the source list and into the target; returns the tags moved.
+    """
+    if to_selected:
+        source, target = available_tags, selected_tags
+        source_canvas, target_canvas = available_canvas, selected_canvas
+        target_key = _selected_key
+    else:
+        source, target = selected_tags, available_tags
+        source_canvas, target_canvas = selected_canvas, available_canvas
+        target_key = _available_key
+
+    # a name can be listed in both panels; it still leaves the source, but
+    # the target keeps its existing row and checked state
+    moved = [tag for tag in tags if tag in source]
+    added = [tag for tag in moved if tag not in target]
+    remove_tag_rows(source_canvas, moved)
+    ids = [source[tag] for tag in added]
+    tag_checks(target)[ids] = tag_checks(source)[ids]
+    for tag in moved:
+        tid = source.pop(tag)
+        target.setdefault(tag, tid)
+    insert_tag_rows(target_canvas, [(target_key(tag), _tag_row(tag, tag_lineage(tag))) for tag in added])
+    return moved
 
 def move_to_selected():
-    splash = show_splash2(root)
-    global available_tags_vars, selected_tags_vars, undo_stack
+    global undo_stack
 
     # 1) Find checked tags in Available
-    moved_tags = [tag for tag, var in available_tags_vars.items() if var.get()]
-
-    # 2) Move each to Selected
-    for tag in moved_tags:
-        var = available_tags_vars.pop(tag)
-        selected_tags_vars[tag] = var
+    moved_tags = checked_tags(available_tags)
 
-    # 3) Re-render both lists (placeholder logic lives in those functions)
-    populate_available_tags(list(available_tags_vars.keys()))
-    
-    populate_selected_tags(list(selected_tags_vars.keys()))
-
-    # 4) Add a divider with current filter values if none exists
-    divider_exists = any(getattr(w, "is_divider", False)
-                         for w in selected_tags_container.winfo_children())
-    if not divider_exists:
-        filter_values = []
-        if vendor_filter_var.get() != "All":
-            filter_values.append("Vendor: " + vendor_filter_var.get())
-        if product_brand_filter_var.get() != "All":
-            filter_values.append("Brand: " + product_brand_filter_var.get())
-        if product_type_filter_var.get() != "All":
-            filter_values.append("Type: " + product_type_filter_var.get())
-        if lineage_filter_var.get() != "All":
-            filter_values.append("Lineage: " + lineage_filter_var.get())
-        if product_strain_filter_var.get() != "All":
-            filter_values.append("Ratio: " + product_strain_filter_var.get())
-        if weight_filter_var.get() != "All":
-            filter_values.append("Weight: " + weight_filter_var.get())
-
-        if not filter_values:
-            filter_values.append("All")
-
-        divider_text = "------- Selected Filter Values: " + ", ".join(filter_values) + " -------"
-        header_divider = tkmod.Label(
-            selected_tags_container,
-            text=divider_text,
-            font=("Arial", 10, "italic"),
-            fg="blue",
-            bg="lightgray"
-        )
-        header_divider.is_divider = True
-        header_divider.pack(
-            fill="x",
-            pady=2,
-            before=selected_tags_container.winfo_children()[0]
-        )
+    # 2) Move them to Selected, touching only their rows
+    moved_tags = _move_tags(moved_tags, to_selected=True)
 
-    # 5) Record the move for undo
-    if moved_tags:
-        undo_stack.append(moved_tags)
+    # 3) Show the current filter values above the list
+    filter_values = []
+    if vendor_filter_var.get() != "All":
+        filter_values.append("Vendor: " + vendor_filter_var.get())
+    if product_brand_filter_var.get() != "All":
+        filter_values.append("Brand: " + product_brand_filter_var.get())
+    if product_type_filter_var.get() != "All":
+        filter_values.append("Type: " + product_type_filter_var.get())
+    if lineage_filter_var.get() != "All":
+        filter_values.append("Lineage: " + lineage_filter_var.get())
+    if product_strain_filter_var.get() != "All":
+        filter_values.append("Ratio: " + product_strain_filter_var.get())
+    if weight_filter_var.get() != "All":
+        filter_values.append("Weight: " + weight_filter_var.get())
 
+    if not filter_values:
+        filter_values.append("All")
 
-    divider_exists = any(getattr(widget, "is_divider", False) for widget in selected_tags_container.winfo_children())
-    if not divider_exists:
-        filter_values = []
-        if vendor_filter_var.get() != "All":
-            filter_values.append("Vendor: " + vendor_filter_var.get())
-        if product_brand_filter_var.get() != "All":
-            filter_values.append("Brand: " + product_brand_filter_var.get())
-        if product_type_filter_var.get() != "All":
-            filter_values.append("Type: " + product_type_filter_var.get())
-        if lineage_filter_var.get() != "All":
-            filter_values.append("Lineage: " + lineage_filter_var.get())
-        if product_strain_filter_var.get() != "All":
-            filter_values.append("Ratio: " + product_strain_filter_var.get())
-        if weight_filter_var.get() != "All":
-            filter_values.append("Weight: " + weight_filter_var.get())
-
-        if not filter_values:
-            filter_values.append("All")
-
-        divider_text = "------- Selected Filter Values: " + ", ".join(filter_values) + " -------"
-        header_divider = tkmod.Label(selected_tags_container, text=divider_text,
-                                     font=("Arial", 10, "italic"), fg="blue", bg="lightgray")
-        header_divider.is_divider = True
-        header_divider.pack(fill="x", pady=2, before=selected_tags_container.winfo_children()[0])
+    set_selected_divider("------- Selected Filter Values: " + ", ".join(filter_values) + " -------")
 
+    # 4) Record the move for undo
     if moved_tags:
         undo_stack.append(moved_tags)
-    splash.destroy()
-
-
+        redo_stack.clear()
 
 def undo_last_move():
-    splash = show_splash2(root)
-    global undo_stack, available_tags_vars, selected_tags_vars, available_tags_container, selected_tags_container
+    global undo_stack
     if not undo_stack:
         messagebox.showinfo("Undo", "No moves to undo.")
         return
     last_move = undo_stack.pop()  # Get the last list of moved tags
-    for tag in last_move:
-        # If the tag is currently in selected tags, remove it from there
-        if tag in selected_tags_vars:
-            # Remove corresponding widget from selected tags container
-            for widget in selected_tags_container.winfo_children():
-                if hasattr(widget, "tag_name") and widget.tag_name == tag:
-                    widget.destroy()
-            var = selected_tags_vars.pop(tag)
-            # Set its value to True so that it remains selected when moved back
-            var.set(True)
-            # Re-add the tag to the available tags container
-            new_chk = tkmod.Checkbutton(available_tags_container, text=tag, variable=var, bg="white", anchor="w")
-            new_chk.tag_name = tag
-            new_chk.pack(fill="x", pady=2)
-            available_tags_vars[tag] = var
-    splash.destroy()
+    # Move back whichever of them are still selected
+    moved = _move_tags(last_move, to_selected=False)
+    # Keep them checked so they stay selected when moved back
+    set_tags_checked(available_tags, [available_tags[tag] for tag in moved], True)
+    if moved:
+        redo_stack.append(moved)
+
+def redo_last_move():
+    if not redo_stack:
+        messagebox.showinfo("Redo", "No moves to redo.")
+        return
+    moved = _move_tags(redo_stack.pop(), to_selected=True)
+    if moved:
+        undo_stack.append(moved)
 
 def clear_selected_list():
-    splash = show_splash2(root)
-    global selected_tags_container, selected_tags_vars, undo_stack
-    if selected_tags_container is None:
-        logging.warning("Selected tags container is not initialized.")
+    global undo_stack
+    if selected_canvas is None:
+        logging.warning("Selected tags panel is not initialized.")
         return
 
-    # Iterate over a copy of the child widget list
-    for widget in list(selected_tags_container.winfo_children()):
-        try:
-            widget.destroy()
-        except Exception as e:
-            logging.error("Error destroying widget in clear_selected_list: %s", e)
     # Clear the dictionaries and undo history
-    selected_tags_vars.clear()
+    selected_tags.clear()
     undo_stack.clear()
+    redo_stack.clear()
+    set_selected_divider(None)
+    render_selected_tags()
 
     # Refresh available product names if necessary.
     try:
@@ -2489,90 +3984,30 @@ def clear_selected_list():
     except Exception as e:
         logging.error("Error updating dropdowns after clearing selected: %s", e)
 
-    splash.destroy()
-
 def move_to_available():
-    splash = show_splash2(root)
-
-    global available_tags_vars, selected_tags_vars, available_tags_container, selected_tags_container
-
     # Don’t do anything if there’s literally no real selected tags
-    to_move = [
-        tag for tag, var in selected_tags_vars.items()
-        if var.get()
-    ]
+    to_move = checked_tags(selected_tags)
     if not to_move:
         return
 
-    for tag in to_move:
-        # Find & destroy only the real tag widget
-        for widget in list(selected_tags_container.winfo_children()):
-            if getattr(widget, "is_placeholder", False):
-                # skip the placeholder image
-                continue
-            if getattr(widget, "tag_name", None) == tag:
-                widget.destroy()
-                break
-
-        # Move its var back to available
-        var = selected_tags_vars.pop(tag)
-        chk = tkmod.Checkbutton(
-            available_tags_container,
-            text=tag,
-            variable=var,
-            bg="white",
-            anchor="w"
-        )
-        chk.tag_name = tag
-        chk.pack(fill="x", pady=2)
-        available_tags_vars[tag] = var
+    _move_tags(to_move, to_selected=False)
 
-    # If nothing remains selected, you might want to show the placeholder:
-    if not selected_tags_vars:
-        populate_selected_tags([])
-    splash.destroy()
+    if not selected_tags:
+        set_selected_divider(None)
 
 
 def move_tag_to_selected(tag):
-    splash = show_splash2(root)
-    global available_tags_vars, selected_tags_vars, available_tags_container, selected_tags_container
-    # Find and destroy the widget from the available container
-    for widget in available_tags_container.winfo_children():
-        if getattr(widget, "tag_name", None) == tag:
-            widget.destroy()
-            break
-    # Pop the BooleanVar from available_tags_vars; if none, create a new one.
-    var = available_tags_vars.pop(tag, tkmod.BooleanVar(value=True))
-    # Create the checkbutton in the selected container.
-    new_chk = tkmod.Checkbutton(selected_tags_container, text=tag, variable=var, bg="lightgray", anchor="w")
-    new_chk.tag_name = tag
-    new_chk.pack(fill="x", pady=2)
-    selected_tags_vars[tag] = var
-    splash.destroy()
+    # Take the tag from Available; if it's in neither panel, add it checked.
+    if tag not in available_tags and tag not in selected_tags:
+        _add_tags(available_tags, [tag])
+    _move_tags([tag], to_selected=True)
 
 def move_tag_to_available(tag):
-    splash = show_splash2(root)
-    global available_tags_vars, selected_tags_vars, available_tags_container, selected_tags_container
-    # Find and destroy the widget from the selected container.
-    for widget in selected_tags_container.winfo_children():
-        if getattr(widget, "tag_name", None) == tag:
-            widget.destroy()
-            break
-    # Create a new BooleanVar for available.
-    new_var = tkmod.BooleanVar(value=False)
-    chk = tkmod.Checkbutton(available_tags_container, text=tag, variable=new_var, bg="white", anchor="w")
-    chk.tag_name = tag
-    chk.pack(fill="x", pady=2)
-    available_tags_vars[tag] = new_var
-    if tag in selected_tags_vars:
-        del selected_tags_vars[tag]
-
-    btn_undo = tkmod.Button(button_container, text="↩️ Undo", font=("Arial", 16), command=undo_last_move)
-    btn_plus.grid(row=0, column=0, pady=5)
-    btn_minus.grid(row=1, column=0, pady=5)
-    clear_selected_btn.grid(row=2, column=0, pady=5)
-    btn_undo.grid(row=3, column=0, pady=5)
-    splash.destroy()
+    if tag not in selected_tags and tag not in available_tags:
+        _add_tags(selected_tags, [tag], checked=False)
+    if _move_tags([tag], to_selected=False):
+        set_tags_checked(available_tags, [available_tags[tag]], False)
+
 
 def edit_template(template_type):
     splash = show_splash2(root)
@@ -2600,37 +4035,17 @@ def edit_template(template_type):
 
 
 def populate_product_names(sorted_names=None):
-    global available_tags_container, selected_tags_container, available_tags_vars, selected_tags_vars, global_df
+    global global_df
     # Preserve names already in selected panel.
-    current_selected = set(selected_tags_vars.keys())
-    df = global_df.copy()
-    if product_type_filter_var.get() != "All":
-        df = df[df["Product Type*"] == product_type_filter_var.get()]
-    if lineage_filter_var.get() != "All":
-        df = df[df["Lineage"] == lineage_filter_var.get()]
-    if product_brand_filter_var.get() != "All":
-        df = df[df["Product Brand"] == product_brand_filter_var.get()]
-    if vendor_filter_var.get() != "All":
-        df = df[df["Vendor"] == vendor_filter_var.get()]
-    if weight_filter_var.get() != "All":
-        df = df[df["CombinedWeight"] == weight_filter_var.get()]
-    if product_strain_filter_var.get() != "All":
-        df = df[df["Product Strain"] == product_strain_filter_var.get()]
+    current_selected = set(selected_tags)
+    df = filtered_frame(current_filters())
     if sorted_names is None:
         names = sorted(df["Product Name*"].dropna().unique())
     else:
         names = sorted(sorted_names)
     # Remove names already selected:
     names = [name for name in names if name not in current_selected]
-    for widget in available_tags_container.winfo_children():
-        widget.destroy()
-    available_tags_vars.clear()
-    for name in names:
-        var = tkmod.BooleanVar(value=True)
-        chk = tkmod.Checkbutton(available_tags_container, text=name, variable=var, bg="white", anchor="w")
-        chk.tag_name = name
-        chk.pack(fill="x", pady=2)
-        available_tags_vars[name] = var
+    populate_available_tags(names)
    
 def sort_products_by(column):
     # Your sorting logic here.
@@ -2656,7 +4071,7 @@ def change_lineage():
     import os, datetime, webbrowser
     from concurrent.futures import ThreadPoolExecutor
     from tkinter import ttk
-    global global_df, selected_tags_vars, root, file_entry
+    global global_df, selected_tags, root, file_entry
     splash = show_splash2(root)
     executor = ThreadPoolExecutor(max_workers=1)
 
@@ -2666,10 +4081,8 @@ def change_lineage():
 
     # 1) Capture old lineages
     old_map = {
-        name: str(global_df.loc[
-            global_df["Product Name*"] == name, "Lineage"
-        ].iloc[0]).upper()
-        for name in selected_tags_vars
+        name: str(name_field(name, "Lineage")).upper()
+        for name in selected_tags
     }
 
     # 2) Define colors & options (including paraphernalia in pink)
@@ -2723,12 +4136,10 @@ def change_lineage():
     popup_vars = {}
 
     # 4) Populate each row: shaded label + Combobox
-    for name in sorted(selected_tags_vars):
+    for name in sorted(selected_tags):
         old_lin = old_map[name]
         # special case: paraphernalia always shows PARAPHERNALIA
-        prod_type = str(global_df.loc[
-            global_df["Product Name*"] == name, "Product Type*"
-        ].iloc[0]).strip().lower()
+        prod_type = str(name_field(name, "Product Type*")).strip().lower()
         if prod_type == "paraphernalia":
             old_lin = "PARAPHERNALIA"
 
@@ -2777,27 +4188,31 @@ def change_lineage():
         df2 = global_df.copy()
         ts  = datetime.datetime.now().isoformat()
         os.makedirs(os.path.dirname(LOG_PATH), exist_ok=True)
+        changes = {}  # new lineage -> names
         with open(LOG_PATH, "a", encoding="utf-8") as log:
             for name, var in popup_vars.items():
                 new_lin = var.get().upper()
                 old_lin = old_map[name]
                 if new_lin != old_lin:
-                    df2.loc[
-                        df2["Product Name*"] == name, "Lineage"
-                    ] = new_lin
-                    if new_lin == "MIXED":
-                        df2.loc[
-                            df2["Product Name*"] == name, "Product Type*"
-                        ] = "Mixed"
+                    changes.setdefault(new_lin, []).append(name)
                     log.write(f"{ts},{name},{old_lin},{new_lin}\n")
+        # one mask per new lineage rather than one per product
+        for new_lin, names in changes.items():
+            rows = df2["Product Name*"].isin(names)
+            # global_df keeps its categoricals now, so make room first
+            df2["Lineage"] = _add_cat_value(df2["Lineage"], new_lin)
+            df2.loc[rows, "Lineage"] = new_lin
+            if new_lin == "MIXED":
+                df2["Product Type*"] = _add_cat_value(df2["Product Type*"], "Mixed")
+                df2.loc[rows, "Product Type*"] = "Mixed"
 
         # 2) Background save & reload
         def save_and_reload():
             nowstr = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
             out = os.path.expanduser(f"~/Downloads/{nowstr}_LineageUpdated.xlsx")
             df2.to_excel(out, index=False)
-            cleaned = preprocess_excel(out)
-            newdf = pd.read_excel(cleaned, engine="openpyxl")
+            # clean the in-memory copy rather than re-parsing what we just wrote
+            newdf = clean_posabit_frame(df2.copy())
             return out, newdf
 
         future = executor.submit(save_and_reload)
@@ -2810,10 +4225,11 @@ def change_lineage():
                 return
 
             # swap in new DataFrame and refresh UI
-            global global_df
-            global_df = newdf
+            set_global_df(newdf, out_path)
             populate_filter_dropdowns()
             populate_product_names()
+            # the edited products changed group, so regroup / recolor Selected
+            render_selected_tags()
             file_entry.delete(0, "end")
             file_entry.insert(0, out_path)
             messagebox.showinfo(
@@ -2966,40 +4382,12 @@ def show_instructions_popup():
     popup.wait_window()
 
 
-def simulate_default_upload():
-    default_file = get_default_file()  # Make sure this helper function is defined
-    if default_file:
-        # Set the file_entry widget to the default file path.
-        file_entry.delete(0, tkmod.END)
-        file_entry.insert(0, default_file)
-        label_file.config(text=os.path.basename(default_file))
-        logging.debug(f"Default file found: {default_file}")
-        try:
-            # Process the default file as if it were just uploaded
-            cleaned_file = preprocess_excel(default_file)
-            logging.debug(f"Preprocessed file: {cleaned_file}")
-            global global_df
-            global_df = pd.read_excel(cleaned_file, engine="openpyxl")
-            logging.debug(f"DataFrame loaded. Columns: {global_df.columns.tolist()}")
-            logging.debug(global_df.head())
-            populate_filter_dropdowns()
-            populate_product_names()
-        except Exception as e:
-            messagebox.showerror("Error", f"Failed to process default file: {e}")
-
 def get_default_file():
     """
-    Searches the user's Downloads folder for Excel files that start with "A Greener Today"
+    Searches the user's Downloads folder for Excel/CSV files that start with "A Greener Today"
     and returns the most recently modified file.
     """
-    downloads_dir = os.path.join(os.path.expanduser("~"), "Downloads")
-    files = [f for f in os.listdir(downloads_dir)
-             if f.startswith("A Greener Today") and f.lower().endswith(".xlsx")]
-    if files:
-        files_full_paths = [os.path.join(downloads_dir, f) for f in files]
-        # Return the most recent file (by modification time)
-        return max(files_full_paths, key=os.path.getmtime)
-    return None
+    return latest_posabit_export()
 
 
 def show_splash(root):
@@ -3081,68 +4469,29 @@ def run_full_process_inventory_slips(selected_df):
             messagebox.showerror("Error", "No data selected.")
             return
 
-        records = selected_df.to_dict(orient="records")
-        pages = []
-
-        for chunk in chunk_records(records, 4):
-            tpl = DocxTemplate(INVENTORY_SLIP_TEMPLATE)
-            context = {}
-
-            slot_num = 1
-            for rec in chunk:
-                product_name = rec.get("Product Name*", "")
-                barcode      = rec.get("Barcode*", "")
-                qty          = rec.get("Quantity Received*", rec.get("Quantity*", ""))
-
-                if not (product_name or barcode or qty):
-                    continue
-
-                try:
-                    qty = int(float(qty))
-                except (ValueError, TypeError):
-                    qty = ""
-
-                context[f"Label{slot_num}"] = {
-                    "ProductName":      product_name,
-                    "Barcode":          barcode,
-                    "AcceptedDate":     rec.get("Accepted Date", ""),
-                    "QuantityReceived": qty,
-                    "Vendor":           rec.get("Vendor", "")
-                }
-                slot_num += 1
-
-            # fill the rest of the 4 slots with blanks
-            for i in range(slot_num, 5):
-                context[f"Label{i}"] = {
-                    "ProductName":      "",
-                    "Barcode":          "",
-                    "AcceptedDate":     "",
-                    "QuantityReceived": "",
-                    "Vendor":           ""
-                }
-
-            tpl.render(context)
-            buf = BytesIO()
-            tpl.save(buf)
-            pages.append(Document(buf))
-
-        if not pages:
+        master_doc = render_inventory_slips(selected_df)
+        if master_doc is None:
             messagebox.showerror("Error", "No documents generated.")
             return
 
+        today = datetime.datetime.today().strftime("%Y-%m-%d")
+        out = os.path.join(os.path.expanduser("~"), "Downloads", f"{today}_inventory_slips.docx")
+        master_doc.save(out)
+        open_file(out)
+        messagebox.showinfo("Success", f"Saved: {out}")
+
 # ------------------ MAIN GUI FUNCTION ------------------
 def main():
     global root, vendor_filter_var, product_brand_filter_var, product_type_filter_var
     global lineage_filter_var, product_strain_filter_var, weight_filter_var, quantity_filter_var
     global file_entry, label_file
-    global selected_tags_all_var, available_tags_all_var, selected_tags_vars
-    global current_canvas, available_tags_container, selected_tags_container
+    global selected_tags_all_var, available_tags_all_var
+    global current_canvas, selected_divider
     global placeholder_img
     global print_vendor_back_var
 
-    selected_tags_vars = {}
-
     root = tkmod.Tk()
+    startup_phase("tk root")
     try:
         placeholder_img = tkmod.PhotoImage(
             file=resource_path("assets/placeholder.png"),
@@ -3184,63 +4533,53 @@ def main():
 
 
     splash = show_splash(root)
+    startup_phase("splash")
         # after you create `root = tkmod.Tk()` in main():
 
-    def normalize_columns(df: pd.DataFrame) -> None:
-        """
-        For each of these expected columns, add a _norm_<col> lowercase, punctuation-stripped
-        helper column — but only if the source column actually exists.
-        """
-        norm_cols = [
-            "Product Type*", "Lineage", "Product Brand", "Vendor",
-            "Product Strain", "CombinedWeight",
-            "Quantity", "Quantity Received*"
-        ]
-        for col in norm_cols:
-            if col in df.columns:
-                norm_col = f"_norm_{col}"
-                df[norm_col] = (
-                    df[col]
-                    .fillna("")
-                    .astype(str)
-                    .str.lower()
-                    .str.replace(r"[^\w\s]", " ", regex=True)
-                    .str.strip()
-                )
-
-
-    def load_default_file():
-        global global_df
-        from pathlib import Path
-
-        downloads_dir = Path.home() / "Downloads"
-        candidates = sorted(
-            downloads_dir.glob("A Greener Today*.xlsx"),
-            key=lambda f: f.stat().st_mtime,
-            reverse=True
-        )
-        if candidates:
-            # read the newest one
-            global_df = pd.read_excel(str(candidates[0]), engine="openpyxl")
-            logging.debug("Default file loaded: %s", candidates[0])
-        else:
-            global_df = pd.DataFrame()
-            logging.debug("No default file found.")
-        # **normalize right after load**
-        normalize_columns(global_df)
+    def load_startup_export():
+        # Runs on the worker pool: find, parse and preprocess the newest
+        # export exactly once.  The Tk thread picks the result up below.
+        t0 = time.perf_counter()
+        path = latest_posabit_export()
+        if not path:
+            logging.debug("No default file matching 'A Greener Today*.xlsx/.csv' found in Downloads.")
+            return None, pd.DataFrame()
+        df = preprocess_excel(path, return_df=True)
+        logging.debug("Default file loaded in %.0f ms: %s", (time.perf_counter() - t0) * 1000, path)
+        return path, df
 
-    # Load file asynchronously
-    from concurrent.futures import ThreadPoolExecutor
-    executor = ThreadPoolExecutor(max_workers=1)
-    future = executor.submit(load_default_file)
+    future = executor.submit(load_startup_export)
 
     def check_load_complete():
-        if future.done():
-            splash.destroy()
-            root.deiconify()
-            setup_gui(root)
-        else:
+        if not future.done():
             splash.after(100, check_load_complete)
+            return
+        startup_phase("waiting for export")
+        try:
+            path, df = future.result()
+        except Exception as e:
+            path, df = None, pd.DataFrame()
+            messagebox.showerror("Error", f"Failed to process default file: {e}")
+        set_global_df(df, path)
+        if path:
+            file_entry.delete(0, tkmod.END)
+            file_entry.insert(0, path)
+            label_file.config(text=os.path.basename(path))
+        # one population pass for the whole startup
+        populate_filter_dropdowns()
+        if "Product Name*" in global_df.columns:
+            populate_product_names()
+        elif path:
+            messagebox.showerror("Missing Column", "'Product Name*' column not found in your uploaded file.")
+        # if no tags have been moved yet, show placeholders in both panels:
+        populate_selected_tags([])
+        startup_phase("populate")
+        splash.destroy()
+        root.deiconify()
+        setup_gui(root)
+        root.update_idletasks()
+        startup_phase("window shown")
+        report_startup_timing()
 
     def setup_gui(root):
         root.title("AGT Price Tag Transformer")
@@ -3271,24 +4610,32 @@ def main():
 
     def upload_file():
         path = filedialog.askopenfilename(
-            filetypes=[("Excel Files", "*.xlsx"), ("CSV Files", "*.csv")]
+            filetypes=[("POSaBit Exports", "*.xlsx *.csv"), ("Excel Files", "*.xlsx"), ("CSV Files", "*.csv")]
         )
         if not path:
             return
+        load_export(path)
 
-        # read & preprocess
-        cleaned = preprocess_excel(path)
-        global global_df
-        global_df = pd.read_excel(cleaned, engine="openpyxl")
+    def load_export(path):
+        # read & preprocess (instant if the Downloads watcher already did it)
+        set_global_df(preprocess_excel(path, return_df=True), path)
         logging.debug("Uploaded file loaded. Columns: %s", global_df.columns.tolist())
-
-        # **normalize right after load**
-        normalize_columns(global_df)
+        label_file.config(text=os.path.basename(path))
+        file_entry.delete(0, tkmod.END)
+        file_entry.insert(0, path)
 
         # refresh all filters & available‐tags panel
         populate_filter_dropdowns()
         populate_product_names()
 
+    def offer_new_export(path):
+        # called on the Tk thread once the watcher has pre-ingested *path*
+        if path != latest_posabit_export():
+            return
+        if messagebox.askyesno("New Export",
+                               f"A new POSaBit export is ready:\n{os.path.basename(path)}\n\nLoad it now?"):
+            load_export(path)
+
     btn_upload = tkmod.Button(left_frame, text="Upload Spreadsheet", command=upload_file,
                                bg="#228B22", font=("Arial", 16), height=2)
     btn_upload.pack(pady=20)
@@ -3300,6 +4647,7 @@ def main():
     #file_entry.pack(fill="x", padx=5, pady=5)
 
     def get_json_url():
+            import urllib.request
             url = json_url_entry.get().strip()
             if not url.lower().startswith("http"):
                 messagebox.showerror("Invalid URL", "Please paste a valid JSON URL.")
@@ -3314,21 +4662,7 @@ def main():
                 messagebox.showerror("Error", f"Failed to fetch JSON:\n{e}")
                 return
 
-            items       = payload.get("inventory_transfer_items", [])
-            vendor_meta = f"{payload.get('from_license_number','')} – {payload.get('from_license_name','')}"
-            raw_date    = payload.get("est_arrival_at", "").split("T")[0]
-
-            records = []
-            for itm in items:
-                records.append({
-                    "Product Name*":      itm.get("product_name", ""),
-                    "Barcode*":           itm.get("inventory_id", ""),
-                    "Quantity Received*": itm.get("qty", ""),
-                    "Accepted Date":      raw_date,
-                    "Vendor":             vendor_meta,
-                })
-
-            df = pd.DataFrame(records)
+            df = transfer_records_frame(payload)
             run_full_process_inventory_slips(df)
 
         # --- new JSON section ---
@@ -3352,20 +4686,18 @@ def main():
         label_file.config(text=os.path.basename(default_file))
 
     filter_defs = [
-        ("\nVendor:", "vendor_filter_var", "vendor_option"),
-        ("\nBrand:", "product_brand_filter_var", "product_brand_option"),
-        ("\nProduct Type:", "product_type_filter_var", "product_type_option"),
-        ("\nLineage (S/H/I):", "lineage_filter_var", "lineage_option"),
-        ("\nCBD Blend:", "product_strain_filter_var", "product_strain_option"),
-        ("\nWeight:", "weight_filter_var", "weight_option")
+        ("\nVendor:", "vendor_filter_var", "vendor_option", "Vendor"),
+        ("\nBrand:", "product_brand_filter_var", "product_brand_option", "Product Brand"),
+        ("\nProduct Type:", "product_type_filter_var", "product_type_option", "Product Type*"),
+        ("\nLineage (S/H/I):", "lineage_filter_var", "lineage_option", "Lineage"),
+        ("\nCBD Blend:", "product_strain_filter_var", "product_strain_option", "Product Strain"),
+        ("\nWeight:", "weight_filter_var", "weight_option", "CombinedWeight")
     ]
-    for text, var_name, option_name in filter_defs:
+    for text, var_name, option_name, column in filter_defs:
         lbl = tkmod.Label(left_frame, text=text, bg="#228B22", font=("Arial", 16), fg="white")
         lbl.pack(pady=3)
         globals()[var_name] = tkmod.StringVar(left_frame, value="All")
-        opt = tkmod.OptionMenu(left_frame, globals()[var_name], "All")
-        opt.config(bg="white", width=10)
-        opt["menu"].config(bg="white")
+        opt = make_filter_dropdown(left_frame, globals()[var_name], multi=column in MULTI_SELECT_COLUMNS)
         opt.pack(pady=5, fill="x")
         globals()[option_name] = opt
 
@@ -3383,10 +4715,25 @@ def main():
                                      activeforeground="white", highlightthickness=0, anchor="w", padx=5)
     quantity_chk.pack(pady=pady_val, fill="x")
 
+    # ---- Price / weight range sliders (see Range Index) ----
+    for key, text, step in (("price_range", "Price ($):", 1), ("weight_range", "Weight (g):", 0.5)):
+        tkmod.Label(left_frame, text=text, bg="#228B22", font=check_font, fg="white", anchor="w").pack(fill="x", padx=5)
+        lo_var, hi_var = tkmod.DoubleVar(left_frame, 0), tkmod.DoubleVar(left_frame, 0)
+        scales = []
+        for var in (lo_var, hi_var):
+            scale = tkmod.Scale(left_frame, variable=var, orient="horizontal", resolution=step,
+                                bg="#228B22", fg="white", font=check_font, highlightthickness=0,
+                                troughcolor="white", sliderlength=12, width=8)
+            scale.pack(fill="x", padx=5)
+            var.trace_add("write", lambda *args: schedule_dropdown_update())
+            # re-warm the presets for the new range once the drag ends
+            scale.bind("<ButtonRelease-1>", lambda e: root.after_idle(warm_filter_presets), add="+")
+            scales.append(scale)
+        range_sliders[key] = (lo_var, hi_var, *scales)
+
     file_entry = tkmod.Entry(left_frame, bd=0, bg="white", fg="#000716")
 
     def clear_filters():
-        splash = show_splash2
         # reset all dropdowns to “All”
         for var in (vendor_filter_var, product_brand_filter_var,
                     product_type_filter_var, lineage_filter_var,
@@ -3396,9 +4743,12 @@ def main():
         global json_matched_names
         json_matched_names = []
         json_url_entry.delete(0, "end")
-        # *then* rebuild everything from the full sheet
-        update_all_dropdowns()
-        splash.destroy()
+        reset_range_sliders()
+        # and the search box, which narrows the Available list too
+        if product_search_var is not None:
+            product_search_var.set("")
+        # *then* rebuild everything from the full sheet, once
+        schedule_dropdown_update()
         
 
 
@@ -3408,6 +4758,52 @@ def main():
                               bg="#228B22", font=("Arial", 16), height=4)
     btn_clear.pack(pady=10, fill="x")
 
+    # ---- Filter presets (saved filter combinations, see Filter Views & Presets) ----
+    preset_var = tkmod.StringVar(left_frame, value="")
+    preset_option = tkmod.OptionMenu(left_frame, preset_var, "")
+    preset_option.config(bg="white", width=10)
+    preset_option["menu"].config(bg="white")
+    preset_option.pack(pady=5, fill="x")
+
+    def apply_preset(name):
+        filters = load_filter_presets().get(name)
+        if filters is None:
+            return
+        preset_var.set(name)
+        # six writes, one coalesced rebuild (served from the view cache)
+        for key, (option, var) in filter_widgets().items():
+            var.set(filters.get(key, "All"))
+
+    def refresh_preset_menu(presets=None):
+        presets = load_filter_presets() if presets is None else presets
+        menu = preset_option["menu"]
+        menu.delete(0, "end")
+        for name in sorted(presets):
+            menu.add_command(label=name, command=lambda _n=name: apply_preset(_n))
+        if preset_var.get() not in presets:
+            preset_var.set("Presets" if presets else "No presets")
+
+    def save_preset():
+        name = simpledialog.askstring("Save Preset", "Name for the current filters:", parent=root)
+        if not name or not name.strip():
+            return
+        refresh_preset_menu(save_filter_preset(name.strip(), current_filters()))
+        preset_var.set(name.strip())
+        warm_filter_presets()
+
+    def delete_preset():
+        name = preset_var.get()
+        if name in load_filter_presets() and messagebox.askyesno("Delete Preset", f"Delete preset “{name}”?"):
+            refresh_preset_menu(delete_filter_preset(name))
+
+    preset_buttons = tkmod.Frame(left_frame, bg="#228B22")
+    preset_buttons.pack(fill="x", pady=(0,10))
+    tkmod.Button(preset_buttons, text="Save Preset", command=save_preset,
+                 bg="white", fg="#228B22", font=("Arial", 10)).pack(side="left", fill="x", expand=True)
+    tkmod.Button(preset_buttons, text="Delete", command=delete_preset,
+                 bg="white", fg="#228B22", font=("Arial", 10)).pack(side="left", fill="x", expand=True)
+    refresh_preset_menu()
+
     # ---------------- Center Frame: Tag Panels ----------------
     center_frame = tkmod.Frame(main_frame, bg="green", width=420, height=800)
     center_frame.pack(side="left", padx=10, pady=10, fill="x", expand=True)
@@ -3428,6 +4824,17 @@ def main():
     sort_buttons_frame = tkmod.Frame(available_panel, bg="#D3D3D3")
     sort_buttons_frame.pack(fill="x", padx=5, pady=5)
 
+    # As-you-type search over name/description (see Search Index)
+    global product_search_var
+    product_search_var = tkmod.StringVar(root)
+    search_frame = tkmod.Frame(available_panel, bg="white")
+    search_frame.pack(fill="x", padx=5, pady=(0,5))
+    tkmod.Label(search_frame, text="🔍", bg="white", font=("Arial", 12)).pack(side="left")
+    search_entry = tkmod.Entry(search_frame, textvariable=product_search_var, font=("Arial", 12))
+    search_entry.pack(side="left", fill="x", expand=True, padx=(2,0))
+    search_entry.bind("<Escape>", lambda e: product_search_var.set(""))
+    product_search_var.trace_add("write", lambda *args: schedule_dropdown_update())
+
     available_header = tkmod.Frame(available_panel, bg="white")
     available_header.pack(fill="x", padx=5, pady=(0,5))
     available_tags_all_var = tkmod.BooleanVar(root, value=True)
@@ -3441,20 +4848,15 @@ def main():
         command=update_available_tags_all_state_available
     )
     available_select_all_chk.pack(side="left", padx=5)
+    tkmod.Button(available_header, text="Invert", font=("Arial", 10),
+                 command=lambda: invert_tags(available_tags)).pack(side="right", padx=5)
 
     global available_canvas
     available_canvas = tkmod.Canvas(available_panel, bg="white")
     available_canvas.pack(side="left", fill="both", expand=True)
     available_scrollbar = tkmod.Scrollbar(available_panel, orient="vertical", command=available_canvas.yview)
     available_scrollbar.pack(side="right", fill="y")
-    available_canvas.configure(yscrollcommand=available_scrollbar.set)
-    available_tags_container = tkmod.Frame(available_canvas, bg="white")
-    available_tags_container.bind("<Configure>", lambda event: available_canvas.configure(scrollregion=available_canvas.bbox("all")))
-    available_canvas.create_window((0, 0), window=available_tags_container, anchor="nw")
-    available_tags_container.bind(
-    "<Configure>",
-    lambda e: available_canvas.configure(scrollregion=available_canvas.bbox("all"))
-)
+    init_tag_panel(available_canvas, available_scrollbar, available_tags)
 
     available_canvas.bind("<Enter>", lambda event: set_current_canvas(event, available_canvas))
     available_canvas.bind("<Leave>", lambda event: clear_current_canvas(event))
@@ -3472,8 +4874,9 @@ def main():
     btn_minus = tkmod.Button(button_container, text="<", font=("Arial", 16), command=move_to_available)
     clear_selected_btn = tkmod.Button(button_container, text="Clear Selected", font=("Arial", 12), command=clear_selected_list)
     btn_undo = tkmod.Button(button_container, text="Undo", font=("Arial", 12), command=undo_last_move)
+    btn_redo = tkmod.Button(button_container, text="Redo", font=("Arial", 12), command=redo_last_move)
 
-    # Instructions '?' button directly under Undo
+    # Instructions '?' button directly under Undo / Redo
     btn_instructions = tkmod.Button(button_container, text="?", font=("Arial", 16, "bold"),
                                     fg="#228B22", bg="white", relief="raised",
                                     command=show_instructions_popup)
@@ -3483,7 +4886,8 @@ def main():
     btn_minus.grid(row=1, column=0, pady=15)
     clear_selected_btn.grid(row=2, column=0, pady=15)
     btn_undo.grid(row=3, column=0, pady=15)
-    btn_instructions.grid(row=4, column=0, pady=10)  # '?' button placed here
+    btn_redo.grid(row=4, column=0, pady=15)
+    btn_instructions.grid(row=5, column=0, pady=10)  # '?' button placed here
 
     
 
@@ -3504,20 +4908,19 @@ def main():
                                        anchor="w",
                                        command=update_selected_tags_all_state)
     select_all_chk.pack(side="left", padx=5)
+    tkmod.Button(selected_header_frame, text="Invert", font=("Arial", 10),
+                 command=lambda: invert_tags(selected_tags)).pack(side="right", padx=5)
+    tkmod.Button(selected_header_frame, text="Check Filtered", font=("Arial", 10),
+                 command=lambda: check_tags_matching_filters(selected_tags)).pack(side="right")
 
     global selected_canvas
     selected_canvas = tkmod.Canvas(selected_panel, bg="white")
     selected_canvas.pack(side="left", fill="both", expand=True)
     selected_scrollbar = tkmod.Scrollbar(selected_panel, orient="vertical", command=selected_canvas.yview)
     selected_scrollbar.pack(side="right", fill="y")
-    selected_canvas.configure(yscrollcommand=selected_scrollbar.set)
-    selected_tags_container = tkmod.Frame(selected_canvas, bg="white")
-    selected_tags_container.bind("<Configure>", lambda event: selected_canvas.configure(scrollregion=selected_canvas.bbox("all")))
-    selected_canvas.create_window((0, 0), window=selected_tags_container, anchor="nw")
-    selected_tags_container.bind(
-    "<Configure>",
-    lambda e: selected_canvas.configure(scrollregion=selected_canvas.bbox("all"))
-)
+    init_tag_panel(selected_canvas, selected_scrollbar, selected_tags)
+    selected_divider = tkmod.Label(selected_panel, font=("Arial", 10, "italic"),
+                                   fg="blue", bg="lightgray")
 
     selected_canvas.bind("<Enter>", lambda event: set_current_canvas(event, selected_canvas))
     selected_canvas.bind("<Leave>", lambda event: clear_current_canvas(event))
@@ -3624,50 +5027,130 @@ def main():
     btn_edit_data.pack(pady=20, fill="x")
 
     def bind_dropdown_traces():
-        vendor_filter_var.trace_add("write", lambda *args: update_all_dropdowns())
-        product_brand_filter_var.trace_add("write", lambda *args: update_all_dropdowns())
-        product_type_filter_var.trace_add("write", lambda *args: update_all_dropdowns())
-        lineage_filter_var.trace_add("write", lambda *args: update_all_dropdowns())
-        product_strain_filter_var.trace_add("write", lambda *args: update_all_dropdowns())
-        weight_filter_var.trace_add("write", lambda *args: update_all_dropdowns())
+        vendor_filter_var.trace_add("write", lambda *args: schedule_dropdown_update())
+        product_brand_filter_var.trace_add("write", lambda *args: schedule_dropdown_update())
+        product_type_filter_var.trace_add("write", lambda *args: schedule_dropdown_update())
+        lineage_filter_var.trace_add("write", lambda *args: schedule_dropdown_update())
+        product_strain_filter_var.trace_add("write", lambda *args: schedule_dropdown_update())
+        weight_filter_var.trace_add("write", lambda *args: schedule_dropdown_update())
+        quantity_filter_var.trace_add("write", lambda *args: schedule_dropdown_update())
+        quantity_filter_var.trace_add("write", lambda *args: root.after_idle(warm_filter_presets))
     bind_dropdown_traces()
 
-    from pathlib import Path
-    downloads_dir = Path.home() / "Downloads"
-    # Use glob to get matching files (case-insensitive if needed)
-    matching_files = sorted(downloads_dir.glob("A Greener Today*.xlsx"),
-                            key=lambda f: f.stat().st_mtime,
-                            reverse=True)
-    if matching_files:
-        default_path = str(matching_files[0])
-        # Update the file_entry widget with the default file path
-        file_entry.delete(0, tkmod.END)
-        file_entry.insert(0, default_path)
-        try:
-            global_df = pd.read_excel(default_path, engine="openpyxl")
-            populate_filter_dropdowns()
-            populate_product_names()  # This function should repopulate available tags automatically
-            logging.debug("Default file loaded: " + default_path)
-        except Exception as e:
-            logging.error("Error reading default file: " + str(e))
-    else:
-        logging.debug("No default file matching 'A Greener Today*.xlsx' found in Downloads.")
-        
-    simulate_default_upload()
-    populate_filter_dropdowns()
-    if "Product Name*" not in global_df.columns:
-        messagebox.showerror("Missing Column", "'Product Name*' column not found in your uploaded file.")
-        return
-    populate_product_names()
-    # if no tags have been moved yet, show placeholders in both panels:
-    populate_selected_tags([])
+    startup_phase("widgets")
     check_load_complete()
 
+    start_downloads_watcher(on_ready=lambda path: root.after(0, lambda: offer_new_export(path)))
+
     logging.debug("Entering mainloop")
     root.mainloop()
     logging.debug("After mainloop (should not reach here until window is closed)")
 
+# ------------------ Headless Command Line ------------------
+EXIT_OK = 0
+EXIT_ERROR = 1
+EXIT_USAGE = 2
+EXIT_NO_RECORDS = 3
+
+def load_transfer_json(source):
+    """Transfer JSON payload from an http(s) URL or a local file."""
+    if source.lower().startswith(("http://", "https://")):
+        import urllib.request
+        with urllib.request.urlopen(source) as resp:
+            return json.loads(resp.read().decode())
+    with open(source, encoding="utf-8") as f:
+        return json.load(f)
+
+def run_headless(argv=None):
+    """
+    Generate one tag sheet / slip document without Tk, e.g.
+
+        python MAIN.py --headless export.xlsx -t mini --vendor "Acme" -o out.docx
+        python MAIN.py --headless transfer.json -t inventory -o slips.docx
+
+    Prints per-phase timings to stderr and returns a process exit code.
+    """
+    import argparse
+    parser = argparse.ArgumentParser(
+        prog="MAIN.py --headless",
+        description="Generate tag sheets or inventory slips without the GUI."
+    )
+    parser.add_argument("input", help="POSaBit export (.xlsx/.csv) or transfer JSON (file or http(s) URL)")
+    parser.add_argument("-t", "--template", default="horizontal",
+                        choices=["horizontal", "vertical", "mini", "inventory"])
+    parser.add_argument("-o", "--output", required=True, help="path of the .docx to write")
+    parser.add_argument("--scale", type=float, default=1.0, help="font scale factor (GUI slider, 0.5-2.0)")
+    for key in TAG_FILTER_COLUMNS:
+        parser.add_argument(f"--{key.replace('_', '-')}", dest=key, default="All",
+                            help=f"only rows whose {TAG_FILTER_COLUMNS[key]} matches")
+    parser.add_argument("--in-stock", action="store_true", help="only products with Quantity > 0")
+    parser.add_argument("--price-range", nargs=2, type=float, metavar=("MIN", "MAX"), help="price in dollars")
+    parser.add_argument("--weight-range", nargs=2, type=float, metavar=("MIN", "MAX"), help="weight in grams")
+    parser.add_argument("--names", help="file with one Product Name* per line to limit the output to")
+    parser.add_argument("--vendor-back", action="store_true", help="add vendor/brand back pages (horizontal/vertical)")
+    parser.add_argument("-v", "--verbose", action="store_true", help="keep debug logging")
+    args = parser.parse_args(argv)
+
+    is_json = args.input.lower().endswith(".json") or args.input.lower().startswith(("http://", "https://"))
+    if is_json and args.template != "inventory":
+        parser.error("transfer JSON input only supports --template inventory")
+    if not args.verbose:
+        logging.getLogger().setLevel(logging.WARNING)
+
+    timings = []
+    def phase(name, t0):
+        timings.append((name, time.perf_counter() - t0))
+        return time.perf_counter()
+
+    t0 = time.perf_counter()
+    try:
+        if is_json:
+            df = transfer_records_frame(load_transfer_json(args.input))
+        else:
+            df = preprocess_excel(args.input, return_df=True, export=False)
+        t0 = phase("load", t0)
+
+        if not is_json:
+            filters = {key: getattr(args, key) for key in TAG_FILTER_COLUMNS}
+            df = apply_filters(df, dict(filters, in_stock=args.in_stock,
+                                        price_range=args.price_range, weight_range=args.weight_range))
+        if args.names:
+            with open(args.names, encoding="utf-8") as f:
+                names = {line.strip() for line in f if line.strip()}
+            df = df[df["Product Name*"].isin(names)]
+        t0 = phase("filter", t0)
+        if df.empty:
+            print("No records found after filtering.", file=sys.stderr)
+            return EXIT_NO_RECORDS
+
+        if args.template == "mini":
+            doc = render_mini_tags(df, args.scale)
+        elif args.template == "inventory":
+            doc = render_inventory_slips(df)
+        else:
+            doc = render_group_tags(df, args.template, args.scale, args.vendor_back)
+        t0 = phase("render", t0)
+        if doc is None:
+            print("No documents generated.", file=sys.stderr)
+            return EXIT_NO_RECORDS
+
+        out_dir = os.path.dirname(os.path.abspath(args.output))
+        os.makedirs(out_dir, exist_ok=True)
+        doc.save(args.output)
+        phase("save", t0)
+    except Exception as e:
+        logging.debug(traceback.format_exc())
+        print(f"Error: {e}", file=sys.stderr)
+        return EXIT_ERROR
+
+    for name, seconds in timings:
+        print(f"{name:<8}{seconds * 1000:>9.0f} ms", file=sys.stderr)
+    print(f"{len(df)} records -> {args.output}", file=sys.stderr)
+    return EXIT_OK
+
 if __name__ == '__main__':
+    if "--headless" in sys.argv[1:]:
+        sys.exit(run_headless([a for a in sys.argv[1:] if a != "--headless"]))
     try:
         main()
     except Exception as e:
@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+Before/after benchmark for the vectorized steps in clean_posabit_frame.
+
+Builds a synthetic 20k-row POSaBit export, runs the old row-wise
+implementations next to the vectorized helpers in MAIN.py, checks the
+outputs are identical and prints the timings.
+
+    python bench_preprocess.py [rows]
+"""
+import sys, time
+import numpy as np
+import pandas as pd
+
+import MAIN
+
+
+# ------------------ Synthetic Export ------------------
+def synthetic_export(rows=20000, seed=0):
+    rng = np.random.default_rng(seed)
+    types = ["Flower", "Pre-Roll", "Infused Pre-Roll", "Edible (Solid)", "Paraphernalia",
+             "Vape Cartridge", "Concentrate", "Tincture", "Samples - Educational"]
+    lineages = ["indica", "sativa", "hybrid", "indica_hybrid", "sativa_hybrid", None]
+    suffixes = ["", " - 1g", " - 10mg THC 10mg CBD", " - 2pk - 1g", " - a - b - c", " - 1:1 CBD"]
+    weights = [1, 3.5, 7, 28, 0.5, None, 100]
+    units = ["grams", "ounces", "g", "oz", None]
+    prices = [25, 12.5, "$30", "'40", 9.99, None, "abc", 100.0, 17.25]
+    strains = ["CBD Blend", "Blue Dream", None]
+
+    pick = lambda seq: [seq[i] for i in rng.integers(len(seq), size=rows)]
+    ptype = pick(types)
+    name = [
+        f"Product {i} {t}{s} by Brand {b}"
+        for i, (t, s, b) in enumerate(zip(ptype, pick(suffixes), rng.integers(300, size=rows)))
+    ]
+    return pd.DataFrame({
+        "Product Name*": name,
+        "Product Type*": ptype,
+        "Lineage": pick(lineages),
+        "Product Brand": [f"Brand {b}" for b in rng.integers(300, size=rows)],
+        "Vendor/Supplier*": [f"Vendor {v}" for v in rng.integers(120, size=rows)],
+        "Weight*": pick(weights),
+        "Weight Unit* (grams/gm or ounces/oz)": pick(units),
+        "Price* (Tier Name for Bulk)": pick(prices),
+        "DOH Compliant (Yes/No)": pick(["Yes", "No"]),
+        "Product Strain": pick(strains),
+        "Quantity*": rng.integers(0, 50, size=rows),
+    })
+
+
+# ------------------ Row-wise Implementations (before) ------------------
+def old_weight(weights):
+    return pd.to_numeric(weights, errors="coerce") \
+        .apply(lambda x: str(int(x)) if pd.notnull(x) and float(x).is_integer() else str(x))
+
+def old_price(prices):
+    def format_p(p):
+        s = str(p).strip().lstrip("$").replace("'", "").strip()
+        try:
+            v = float(s)
+            return f"${int(v)}" if v.is_integer() else f"${v:.2f}"
+        except:
+            return f"${s}"
+    return prices.apply(lambda x: format_p(x) if pd.notnull(x) else "")
+
+def old_strain(strain):
+    return strain.astype(str).apply(
+        lambda s: "CBD Blend" if s == "CBD Blend" else "Mixed"
+    ).astype("category")
+
+def old_ratio(df):
+    def process_ratio(row):
+        t = str(row.get("Product Type*", "")).strip().lower()
+        if t in ["pre-roll", "infused pre-roll"]:
+            parts = str(row.get("Ratio", "")).split(" - ")
+            if len(parts) >= 3:
+                new = " - ".join(parts[2:]).strip()
+            elif len(parts) == 2:
+                new = parts[1].strip()
+            else:
+                new = parts[0].strip()
+            return f" - {new}" if not new.startswith(" - ") else new
+        return row.get("Ratio", "")
+    return df.apply(process_ratio, axis=1)
+
+
+# ------------------ Benchmark ------------------
+def best_of(fn, repeat=3):
+    best, result = float("inf"), None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - t0)
+    return best, result
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    raw = synthetic_export(rows)
+    cleaned = MAIN.clean_posabit_frame(raw.copy())
+
+    # inputs exactly as clean_posabit_frame sees them at each step
+    weights = raw["Weight*"]
+    prices = raw["Price* (Tier Name for Bulk)"]
+    strain = raw["Product Strain"].astype("category")
+    ratio_df = pd.DataFrame({
+        "Product Type*": raw["Product Type*"].astype("category"),
+        "Ratio": raw["Product Name*"].str.extract(r"-\s*(.+)")[0].fillna("").str.replace(" / ", " "),
+    })
+
+    steps = [
+        ("Weight* stringify", lambda: old_weight(weights),
+                              lambda: MAIN.format_weight_column(weights)),
+        ("Price format",      lambda: old_price(prices),
+                              lambda: MAIN.format_price_column(prices)),
+        ("Strain override",   lambda: old_strain(strain),
+                              lambda: MAIN.force_mixed_strain(strain)),
+        ("Pre-roll Ratio",    lambda: old_ratio(ratio_df),
+                              lambda: MAIN.preroll_ratio_column(ratio_df["Ratio"], ratio_df["Product Type*"])),
+    ]
+
+    print(f"{rows} synthetic rows ({len(cleaned)} after cleaning)\n")
+    print(f"{'step':<20}{'before (ms)':>14}{'after (ms)':>14}{'speedup':>10}")
+    total_old = total_new = 0.0
+    for label, old, new in steps:
+        t_old, r_old = best_of(old)
+        t_new, r_new = best_of(new)
+        # row-wise .apply infers the result dtype (object vs str) by pandas version
+        pd.testing.assert_series_equal(r_old, r_new, check_names=False, check_dtype=False)
+        total_old += t_old
+        total_new += t_new
+        print(f"{label:<20}{t_old * 1e3:>14.1f}{t_new * 1e3:>14.1f}{t_old / t_new:>9.1f}x")
+    print(f"{'total':<20}{total_old * 1e3:>14.1f}{total_new * 1e3:>14.1f}{total_old / total_new:>9.1f}x")
+
+    t_clean, _ = best_of(lambda: MAIN.clean_posabit_frame(raw.copy()))
+    print(f"\nclean_posabit_frame end to end: {t_clean * 1e3:.1f} ms")
+
+if __name__ == "__main__":
+    main()